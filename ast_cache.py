@@ -0,0 +1,171 @@
+# The ASTCache skips lexing and parsing for programs it has seen before. Parsed ASTs
+# are kept in an in-memory LRU and, optionally, in a directory on disk so that they
+# survive across processes. Entries are keyed by a hash of the program text and of
+# the parser itself (the grammar signature in parsetab.py plus the source of the
+# modules that build the AST), so editing brewparse.py invalidates old entries. On
+# disk, ASTs are stored in the compact binary format of ast_codec.
+import hashlib
+import os
+from collections import OrderedDict
+
+import parsetab
+from ast_codec import decode_ast, encode_ast
+from brewparse import parse_program
+
+# modules whose source determines the shape of the AST
+PARSER_MODULES = ("brewlex.py", "brewparse.py", "element.py", "ast_codec.py")
+HEX_DIGITS = "0123456789abcdef"
+
+
+def parser_fingerprint():
+    digest = hashlib.sha256(parsetab._lr_signature.encode())
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    for module in PARSER_MODULES:
+        with open(os.path.join(base_dir, module), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ASTCache:
+    # max_entries: number of ASTs kept in memory
+    # directory: where ASTs are stored on disk, or None to only cache in memory
+    # max_disk_bytes: total size of the on-disk store before the least recently
+    #   used entries are evicted
+    def __init__(self, max_entries=256, directory=None, max_disk_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.fingerprint = parser_fingerprint()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.directory = None
+        if directory is not None:
+            # entries of other parser versions live in sibling directories
+            self.directory = os.path.join(directory, self.fingerprint[:16])
+            os.makedirs(self.directory, exist_ok=True)
+            self.__remove_stale_versions(directory)
+
+    # Returns the AST of a program, parsing it only on a cache miss. The returned
+    # AST is shared with later callers and must not be modified.
+    def parse(self, program):
+        key = self.key(program)
+        ast = self.entries.get(key)
+        if ast is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return ast
+        ast = self.__load(key)
+        if ast is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            ast = parse_program(program)
+            self.__store(key, ast)
+        self.entries[key] = ast
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return ast
+
+    def key(self, program):
+        digest = hashlib.sha256(self.fingerprint.encode())
+        digest.update(program.encode())
+        return digest.hexdigest()
+
+    def clear(self):
+        self.entries.clear()
+        if self.directory is not None:
+            for entry in os.scandir(self.directory):
+                self.__remove(entry.path)
+
+    def __path(self, key):
+        return os.path.join(self.directory, key + ".ast")
+
+    def __load(self, key):
+        if self.directory is None:
+            return None
+        path = self.__path(key)
+        try:
+            with open(path, "rb") as f:
+                ast = decode_ast(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # a truncated or corrupt entry is treated as a miss
+            self.__remove(path)
+            return None
+        try:
+            # mark the entry as recently used for disk eviction
+            os.utime(path)
+        except OSError:
+            # another process evicted it since it was read
+            pass
+        return ast
+
+    def __store(self, key, ast):
+        if self.directory is None:
+            return
+        try:
+            data = encode_ast(ast)
+        except Exception:
+            # an AST the codec can't handle is only cached in memory
+            return
+        path = self.__path(key)
+        # write to a temporary file first so readers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            # the disk store is best effort: the AST stays cached in memory
+            self.__remove(tmp_path)
+            return
+        self.__evict_disk()
+
+    def __evict_disk(self):
+        stats = {}
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".ast"):
+                    try:
+                        stats[entry.path] = entry.stat()
+                    except FileNotFoundError:
+                        # evicted by another process
+                        pass
+        except OSError:
+            return
+        total = sum(stat.st_size for stat in stats.values())
+        # least recently used first
+        for path, stat in sorted(stats.items(), key=lambda item: item[1].st_mtime):
+            if total <= self.max_disk_bytes:
+                break
+            self.__remove(path)
+            total -= stat.st_size
+
+    # Delete the entries of other parser versions. Only directories named like a
+    # fingerprint that hold nothing but cache entries are touched.
+    def __remove_stale_versions(self, directory):
+        for entry in os.scandir(directory):
+            if entry.path == self.directory or not entry.is_dir():
+                continue
+            if len(entry.name) != 16 or not all(c in HEX_DIGITS for c in entry.name):
+                continue
+            files = list(os.scandir(entry.path))
+            if not all(f.name.endswith((".ast", ".tmp")) for f in files):
+                continue
+            for f in files:
+                self.__remove(f.path)
+            try:
+                os.rmdir(entry.path)
+            except OSError:
+                # another process is still writing to it
+                pass
+
+    # other processes sharing the directory may have removed the file already; a file
+    # that can't be removed is left for a later eviction
+    def __remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,185 @@
+# A compact binary encoding of Element trees, used to cache parsed programs on disk
+# and to ship them between processes without re-running the parser.
+#
+# Layout: MAGIC, then the string table (count, then each string as length + UTF-8
+# bytes), then the root value. Every value starts with a tag byte:
+#   NONE_TAG / TRUE_TAG / FALSE_TAG  no payload
+#   INT_TAG     zigzag varint
+#   STR_TAG     varint index into the string table
+#   LIST_TAG    varint length, then the items
+#   DICT_NODE_TAG  a DictElement: elem_type string index, field count, then
+#                  (field name string index, value) pairs
+#   NODE_TAG + code  a slotted node whose elem_type is NODE_TYPES[code], followed
+#                  by the values of its fields in field_names order
+# Counts, lengths and indexes are unsigned LEB128 varints.
+from element import DictElement, NODE_CLASSES
+
+MAGIC = b"BRAST\x01"
+
+NONE_TAG = 0
+TRUE_TAG = 1
+FALSE_TAG = 2
+INT_TAG = 3
+STR_TAG = 4
+LIST_TAG = 5
+DICT_NODE_TAG = 6
+NODE_TAG = 16
+
+NODE_TYPES = tuple(NODE_CLASSES)
+NODE_CODES = {elem_type: code for code, elem_type in enumerate(NODE_TYPES)}
+
+
+def write_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def encode_ast(node):
+    out = bytearray()
+    # string -> index in the string table, in order of first use
+    strings = {}
+
+    def write_string(s):
+        index = strings.get(s)
+        if index is None:
+            index = strings[s] = len(strings)
+        write_varint(out, index)
+
+    # values still to be written, last one first. Nodes are expanded from this
+    # explicit stack rather than by recursion, so trees of any depth can be encoded;
+    # a 1-tuple holds a DictElement field name to write before its value.
+    pending = [node]
+    while pending:
+        value = pending.pop()
+        if value is None:
+            out.append(NONE_TAG)
+        elif value is True:
+            out.append(TRUE_TAG)
+        elif value is False:
+            out.append(FALSE_TAG)
+        elif isinstance(value, int):
+            out.append(INT_TAG)
+            write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+        elif isinstance(value, str):
+            out.append(STR_TAG)
+            write_string(value)
+        elif isinstance(value, tuple):
+            write_string(value[0])
+        elif isinstance(value, list):
+            out.append(LIST_TAG)
+            write_varint(out, len(value))
+            pending.extend(reversed(value))
+        elif isinstance(value, DictElement):
+            out.append(DICT_NODE_TAG)
+            write_string(value.elem_type)
+            write_varint(out, len(value.fields))
+            for key, field in reversed(value.fields.items()):
+                pending.append(field)
+                pending.append((key,))
+        else:
+            out.append(NODE_TAG + NODE_CODES[value.elem_type])
+            for key in reversed(value.field_names):
+                pending.append(getattr(value, key))
+
+    # the string table goes before the tree, so it is built after encoding the tree
+    header = bytearray(MAGIC)
+    write_varint(header, len(strings))
+    for s in strings:
+        encoded = s.encode()
+        write_varint(header, len(encoded))
+        header += encoded
+    return bytes(header + out)
+
+
+def decode_ast(data):
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not an encoded Brewin AST")
+    pos = len(MAGIC)
+    node_classes = [NODE_CLASSES[elem_type] for elem_type in NODE_TYPES]
+    field_counts = [len(cls.field_names) for cls in node_classes]
+
+    def read_varint():
+        nonlocal pos
+        byte = data[pos]
+        pos += 1
+        if byte < 0x80:
+            return byte
+        n = byte & 0x7F
+        shift = 7
+        while True:
+            byte = data[pos]
+            pos += 1
+            n |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return n
+            shift += 7
+
+    num_strings = read_varint()
+    strings = []
+    for _ in range(num_strings):
+        length = read_varint()
+        strings.append(data[pos : pos + length].decode())
+        pos += length
+
+    # containers still being read, innermost last, each a list of [tag, values
+    # read so far, number of values, DictElement elem_type, field names]. Reading from this explicit stack rather than by recursion lets
+    # trees of any depth be decoded.
+    open_containers = []
+    while True:
+        if open_containers and open_containers[-1][0] == DICT_NODE_TAG:
+            open_containers[-1][4].append(strings[read_varint()])
+        tag = data[pos]
+        pos += 1
+        if tag >= NODE_TAG:
+            code = tag - NODE_TAG
+            if field_counts[code]:
+                open_containers.append([tag, [], field_counts[code], None, None])
+                continue
+            value = node_classes[code](NODE_TYPES[code])
+        elif tag == STR_TAG:
+            value = strings[read_varint()]
+        elif tag == LIST_TAG:
+            length = read_varint()
+            if length:
+                open_containers.append([LIST_TAG, [], length, None, None])
+                continue
+            value = []
+        elif tag == NONE_TAG:
+            value = None
+        elif tag == INT_TAG:
+            n = read_varint()
+            value = -(n >> 1) - 1 if n & 1 else n >> 1
+        elif tag == TRUE_TAG:
+            value = True
+        elif tag == FALSE_TAG:
+            value = False
+        elif tag == DICT_NODE_TAG:
+            elem_type = strings[read_varint()]
+            num_fields = read_varint()
+            if num_fields:
+                open_containers.append([DICT_NODE_TAG, [], num_fields, elem_type, []])
+                continue
+            value = DictElement(elem_type)
+        else:
+            raise ValueError(f"Unknown tag {tag} in encoded AST")
+        # hand the value to its container, and every container completed by it to
+        # the container around it
+        while open_containers:
+            container = open_containers[-1]
+            values = container[1]
+            values.append(value)
+            if len(values) < container[2]:
+                break
+            open_containers.pop()
+            tag = container[0]
+            if tag == LIST_TAG:
+                value = values
+            elif tag == DICT_NODE_TAG:
+                value = DictElement(container[3], **dict(zip(container[4], values)))
+            else:
+                code = tag - NODE_TAG
+                value = node_classes[code](NODE_TYPES[code], *values)
+        else:
+            return value
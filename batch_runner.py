@@ -0,0 +1,270 @@
+# The BatchRunner runs many independent Brewin programs on a pool of worker
+# processes. Every worker imports the interpreter and builds the parser once, then
+# runs programs sent to it over a pipe, one at a time. Results are yielded as they
+# arrive, so callers can stream them.
+# A program that runs longer than the timeout gets its worker killed and replaced,
+# as does a worker that dies. A worker is also replaced after max_tasks_per_worker
+# programs, so memory a program leaves behind doesn't pile up.
+# Run from the repository root to run .br files, printing one JSON line per file:
+#   python batch_runner.py [-j processes] [-t timeout] [-m exec_mode] file.br ...
+# Input for a file is taken from the lines between its *IN* markers, as in tests/.
+import json
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing.connection import wait
+
+from brewparse import parse_program
+from interpreterv2 import Interpreter
+
+# BatchResult statuses
+OK = "ok"
+# the program raised a Brewin error (see InterpreterBase.error)
+ERROR = "error"
+# the interpreter raised any other exception
+EXCEPTION = "exception"
+TIMEOUT = "timeout"
+# the worker running the program died
+CRASHED = "crashed"
+
+
+class BatchResult:
+    __slots__ = (
+        "index",
+        "status",
+        "output_log",
+        "error_type",
+        "error_line",
+        "message",
+        "wall_time",
+    )
+
+    def __init__(
+        self, index, status, output_log=None, error_type=None, error_line=None, message=None, wall_time=0.0
+    ):
+        # position of the program in the tasks given to BatchRunner.run
+        self.index = index
+        self.status = status
+        self.output_log = output_log if output_log is not None else []
+        self.error_type = error_type
+        self.error_line = error_line
+        # str() of the exception that ended the program, if any
+        self.message = message
+        self.wall_time = wall_time
+
+
+# Lines between the first pair of the given markers in a program, e.g. "*OUT*", or
+# None if there is no such pair
+def marked_lines(program, marker):
+    parts = program.split(marker)
+    if len(parts) < 3:
+        return None
+    block = parts[1].strip("\r\n")
+    return block.splitlines() if block else []
+
+
+# Lines between the *IN* markers of a program's trailing comment, stripped, or None
+def embedded_inputs(program):
+    inputs = marked_lines(program, "*IN*")
+    if inputs is None:
+        return None
+    return [line.strip() for line in inputs]
+
+
+def worker_main(conn, interpreter_args):
+    # build the lexer and parser tables before the first program arrives
+    parse_program("func main() { print(0); }")
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        index, program, inp = task
+        interpreter = Interpreter(console_output=False, inp=inp, **interpreter_args)
+        status = OK
+        message = None
+        start = time.perf_counter()
+        try:
+            interpreter.run(program)
+        except Exception as e:
+            status = ERROR if interpreter.error_type is not None else EXCEPTION
+            message = str(e)
+        wall_time = time.perf_counter() - start
+        conn.send(
+            BatchResult(
+                index,
+                status,
+                interpreter.get_output(),
+                interpreter.error_type,
+                interpreter.error_line,
+                message,
+                wall_time,
+            )
+        )
+
+
+class BatchWorker:
+    def __init__(self, context, interpreter_args):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=worker_main, args=(child_conn, interpreter_args), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        # index of the running program, or None when idle
+        self.index = None
+        self.started = 0.0
+        self.tasks_run = 0
+
+    def send(self, index, program, inp):
+        self.index = index
+        self.started = time.monotonic()
+        self.conn.send((index, program, inp))
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class BatchRunner:
+    # processes: number of workers, None for one per CPU
+    # timeout: seconds a program may run before its worker is killed, or None
+    # max_tasks_per_worker: programs a worker runs before it is replaced
+    # interpreter_args: keyword arguments for every Interpreter, e.g. exec_mode
+    def __init__(self, processes=None, timeout=10.0, max_tasks_per_worker=1000, **interpreter_args):
+        self.timeout = timeout
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.interpreter_args = interpreter_args
+        self.context = multiprocessing.get_context()
+        self.workers = [self.__start_worker() for _ in range(processes or os.cpu_count())]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for worker in self.workers:
+            worker.stop()
+        self.workers = []
+
+    # Runs tasks, each a program or a (program, inputs) pair, and yields a
+    # BatchResult for each as soon as it finishes, in order of completion
+    def run(self, tasks):
+        try:
+            yield from self.__run(tasks)
+        finally:
+            # the caller stopped early: results still in flight must not be read
+            # as the results of a later run
+            for worker in list(self.workers):
+                if worker.index is not None:
+                    self.__replace(worker)
+
+    def __run(self, tasks):
+        tasks = enumerate(tasks)
+        running = 0
+        for worker in self.workers:
+            running += self.__send_next(worker, tasks)
+        while running:
+            busy = [worker for worker in self.workers if worker.index is not None]
+            ready = wait([worker.conn for worker in busy], self.__time_left(busy))
+            now = time.monotonic()
+            for worker in busy:
+                if worker.conn in ready:
+                    try:
+                        result = worker.conn.recv()
+                    except (EOFError, OSError):
+                        result = BatchResult(
+                            worker.index, CRASHED, wall_time=now - worker.started
+                        )
+                        worker = self.__replace(worker)
+                    else:
+                        worker.tasks_run += 1
+                        if worker.tasks_run >= self.max_tasks_per_worker:
+                            worker = self.__replace(worker)
+                elif self.timeout is not None and now - worker.started >= self.timeout:
+                    result = BatchResult(
+                        worker.index,
+                        TIMEOUT,
+                        message=f"Timed out after {self.timeout} s",
+                        wall_time=now - worker.started,
+                    )
+                    worker = self.__replace(worker)
+                else:
+                    continue
+                worker.index = None
+                running -= 1
+                yield result
+                running += self.__send_next(worker, tasks)
+
+    # Returns 1 if a task was sent to the worker, 0 if there are none left
+    def __send_next(self, worker, tasks):
+        task = next(tasks, None)
+        if task is None:
+            return 0
+        index, program = task
+        inp = None
+        if not isinstance(program, str):
+            program, inp = program
+        if not worker.process.is_alive():
+            # died while idle, e.g. killed from outside
+            worker = self.__replace(worker)
+        worker.send(index, program, inp)
+        return 1
+
+    # Seconds until the first running program times out
+    def __time_left(self, busy):
+        if self.timeout is None:
+            return None
+        first_started = min(worker.started for worker in busy)
+        return max(0.0, first_started + self.timeout - time.monotonic())
+
+    def __start_worker(self):
+        return BatchWorker(self.context, self.interpreter_args)
+
+    def __replace(self, worker):
+        worker.kill()
+        new_worker = self.__start_worker()
+        self.workers[self.workers.index(worker)] = new_worker
+        return new_worker
+
+
+def main():
+    args = sys.argv[1:]
+    options = {"-j": None, "-t": 10.0, "-m": "tree"}
+    while args and args[0] in options:
+        options[args[0]] = args[1]
+        args = args[2:]
+    processes = int(options["-j"]) if options["-j"] is not None else None
+    tasks = []
+    for path in args:
+        with open(path) as f:
+            program = f.read()
+        tasks.append((program, embedded_inputs(program)))
+    with BatchRunner(processes, float(options["-t"]), exec_mode=options["-m"]) as runner:
+        for result in runner.run(tasks):
+            record = {
+                "file": args[result.index],
+                "status": result.status,
+                "output": result.output_log,
+                "error_type": result.error_type.name if result.error_type else None,
+                "error_line": result.error_line,
+                "message": result.message,
+                "wall_time": round(result.wall_time, 6),
+            }
+            print(json.dumps(record), flush=True)
+
+
+if __name__ == "__main__":
+    main()
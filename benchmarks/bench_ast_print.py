@@ -0,0 +1,39 @@
+# Times printing the AST of generated programs of growing size, as str(ast) and
+# streamed to a temporary file with Element.write_to, and printing an expression
+# nested deeper than Python's recursion limit.
+# Run from the repository root: python -m benchmarks.bench_ast_print [max_lines]
+import sys
+import tempfile
+import time
+
+from benchmarks.generate import generate_program
+from brewparse import parse_program
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return time.perf_counter() - start, result
+
+
+def main():
+    max_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 64_000
+    num_lines = max_lines // 16
+    while num_lines <= max_lines:
+        ast = parse_program(generate_program(num_lines))
+        str_time, text = timed(lambda: str(ast))
+        with tempfile.TemporaryFile("w") as f:
+            write_time, _ = timed(lambda: ast.write_to(f))
+        print(
+            f"{num_lines:>7} lines  {len(text) / 1e6:6.1f} MB  "
+            f"str {str_time:6.3f} s  write_to {write_time:6.3f} s"
+        )
+        num_lines *= 2
+    depth = 5000
+    ast = parse_program("func main() { print(" + "1 + " * depth + "1); }")
+    str_time, text = timed(lambda: str(ast))
+    print(f"expression nested {depth} deep  {len(text) / 1e6:6.1f} MB  str {str_time:6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
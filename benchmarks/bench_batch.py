@@ -0,0 +1,53 @@
+# Runs the programs in tests/ and fails/ many times over, once one after another in
+# this process and once through BatchRunners with different numbers of workers.
+# Speedups depend on the number of CPUs: with one CPU, the batch runner can only add
+# the cost of sending programs and results between processes.
+# Run from the repository root: python -m benchmarks.bench_batch [rounds]
+import glob
+import os
+import sys
+import time
+
+from batch_runner import BatchRunner, embedded_inputs
+from interpreterv2 import Interpreter
+
+
+def load_tasks(rounds):
+    tasks = []
+    for path in sorted(glob.glob("tests/*.br") + glob.glob("fails/*.br")):
+        with open(path) as f:
+            program = f.read()
+        tasks.append((program, embedded_inputs(program)))
+    return tasks * rounds
+
+
+def run_sequential(tasks):
+    for program, inp in tasks:
+        interpreter = Interpreter(console_output=False, inp=inp)
+        try:
+            interpreter.run(program)
+        except Exception:
+            pass
+
+
+def run_batch(tasks, processes):
+    with BatchRunner(processes) as runner:
+        for _ in runner.run(tasks):
+            pass
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    tasks = load_tasks(rounds)
+    configs = [("sequential", lambda: run_sequential(tasks))]
+    for processes in sorted({1, 2, os.cpu_count()}):
+        configs.append((f"batch, {processes} workers", lambda p=processes: run_batch(tasks, p)))
+    for name, run in configs:
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<20} {elapsed:7.3f} s  {len(tasks) / elapsed:8.1f} programs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# Compares encoding/decoding ASTs with ast_codec against re-parsing and pickle.
+# Run from the repository root: python -m benchmarks.bench_codec [num_lines]
+import pickle
+import sys
+import time
+
+from ast_codec import decode_ast, encode_ast
+from brewparse import parse_program
+from benchmarks.generate import generate_program
+
+
+def timed(f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    program = generate_program(num_lines)
+    ast, parse_time = timed(parse_program, program)
+    encoded, encode_time = timed(encode_ast, ast)
+    _, decode_time = timed(decode_ast, encoded)
+    pickled, pickle_time = timed(pickle.dumps, ast, pickle.HIGHEST_PROTOCOL)
+    _, unpickle_time = timed(pickle.loads, pickled)
+
+    print(f"program:  {len(program):>10} bytes, {num_lines} lines")
+    print(f"parse:    {parse_time:10.3f} s")
+    print(f"encode:   {encode_time:10.3f} s  {len(encoded):>10} bytes")
+    print(f"decode:   {decode_time:10.3f} s")
+    print(f"pickle:   {pickle_time:10.3f} s  {len(pickled):>10} bytes")
+    print(f"unpickle: {unpickle_time:10.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Measures the cost of evaluating single expression nodes in the tree walker, to
+# compare how it dispatches on node types. Leaf nodes are timed on their own and
+# operators over two leaves, so most of the time is spent finding what to run.
+# Run from the repository root: python -m benchmarks.bench_dispatch [repeats]
+import sys
+import timeit
+
+from brewparse import parse_program
+from env_v1 import EnvironmentManager
+from interpreterv2 import Interpreter
+from type_valuev1 import TRUE_VALUE, int_value
+
+ROUNDS = 5
+
+# one assignment per node type; the right-hand side of each is timed
+EXPRESSIONS = {
+    "int": "5",
+    "string": '"s"',
+    "bool": "true",
+    "nil": "nil",
+    "var": "x",
+    "neg": "-x",
+    "!": "!b",
+    "+": "x + 1",
+    "<": "x < 1",
+    "==": "x == nil",
+    "&&": "b && b",
+}
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    statements = "".join(f"y = {expr};\n" for expr in EXPRESSIONS.values())
+    ast = parse_program(f"func main() {{\n{statements}}}")
+    statements = ast.get("functions")[0].get("statements")
+    nodes = [statement.get("expression") for statement in statements]
+
+    interpreter = Interpreter(console_output=False)
+    interpreter.env = EnvironmentManager()
+    interpreter.env.create("x", int_value(5))
+    interpreter.env.create("b", TRUE_VALUE)
+    eval_expr = interpreter._Interpreter__eval_expr
+    for name, node in zip(EXPRESSIONS, nodes):
+        # best of several rounds, to filter out noise from the rest of the machine
+        elapsed = min(timeit.repeat(lambda: eval_expr(node), number=repeats, repeat=ROUNDS))
+        print(f"{name:<8} {elapsed / repeats * 1e9:8.0f} ns per evaluation")
+
+
+if __name__ == "__main__":
+    main()
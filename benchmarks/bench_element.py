@@ -0,0 +1,35 @@
+# Measures parse time and AST memory per node for a generated 100k-line program.
+# Run from the repository root: python -m benchmarks.bench_element [num_lines]
+import sys
+import time
+import tracemalloc
+
+from brewparse import parse_program
+from benchmarks.generate import generate_program
+from optimizer_v2 import count_nodes
+
+
+def main():
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    program = generate_program(num_lines)
+
+    start = time.perf_counter()
+    ast = parse_program(program)
+    parse_time = time.perf_counter() - start
+    num_nodes = count_nodes(ast)
+    del ast
+
+    tracemalloc.start()
+    ast = parse_program(program)
+    ast_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"lines:          {program.count(chr(10))}")
+    print(f"nodes:          {num_nodes}")
+    print(f"parse time:     {parse_time:.3f} s")
+    print(f"AST memory:     {ast_bytes / 1e6:.1f} MB")
+    print(f"bytes per node: {ast_bytes / num_nodes:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Sums n numbers read with inputi() from a temporary file, first streaming the file
+# through an InputSource, then from a list holding the whole input. Peak memory only
+# grows, so the streaming run goes first and the two are measured in that order.
+# Run from the repository root: python -m benchmarks.bench_input [n]
+import resource
+import sys
+import tempfile
+import time
+
+from interpreterv2 import Interpreter
+
+PROGRAM = """
+func main() {
+  var i;
+  var total;
+  total = 0;
+  for (i = 0; i < %d; i = i + 1) {
+    total = total + inputi();
+  }
+  print(total);
+}
+"""
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+
+
+def run(program, inp):
+    interpreter = Interpreter(console_output=False, inp=inp, exec_mode="python")
+    start = time.perf_counter()
+    interpreter.run(program)
+    return time.perf_counter() - start, interpreter.get_output()[-1]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    program = PROGRAM % n
+    with tempfile.TemporaryFile("w+") as f:
+        for i in range(n):
+            f.write(f"{i}\n")
+        f.seek(0)
+        print(f"before: peak memory {max_rss_mb()} MB")
+        elapsed, result = run(program, f)
+        print(f"{'streamed file':<14} {elapsed:7.3f} s  {result}  peak memory {max_rss_mb()} MB")
+        f.seek(0)
+        start = time.perf_counter()
+        lines = f.read().splitlines()
+        elapsed, result = run(program, lines)
+        elapsed += time.perf_counter() - start
+        print(f"{'list':<14} {elapsed:7.3f} s  {result}  peak memory {max_rss_mb()} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# Runs a naive recursive Fibonacci in every execution mode, with and without a
+# MemoCache. fib is pure, so with the cache each fib(i) runs once and the exponential
+# call tree becomes linear.
+# Run from the repository root: python -m benchmarks.bench_memo [n]
+import sys
+import time
+
+from interpreterv2 import Interpreter
+from memo_cache import MemoCache
+
+PROGRAM = """
+func fib(n) {
+  if (n < 2) {
+    return n;
+  }
+  return fib(n - 1) + fib(n - 2);
+}
+
+func main() {
+  print(fib(%d));
+}
+"""
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 22
+    for exec_mode in sorted(Interpreter.EXEC_MODES):
+        for memo_cache in (None, MemoCache()):
+            interpreter = Interpreter(
+                console_output=False, exec_mode=exec_mode, memo_cache=memo_cache
+            )
+            start = time.perf_counter()
+            interpreter.run(PROGRAM % n)
+            elapsed = time.perf_counter() - start
+            line = f"{exec_mode:<10} {elapsed:8.3f} s  fib({n}) = {interpreter.get_output()[-1]}"
+            if memo_cache is not None:
+                line += f"  memoized: {memo_cache.hits} hits, {memo_cache.misses} misses"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
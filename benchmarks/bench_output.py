@@ -0,0 +1,57 @@
+# Prints n lines from a Brewin loop, writing them to a temporary file, once with a
+# print() per line and once through OutputSinks with different output_log settings.
+# The python execution mode keeps interpreter overhead low, so the times are mostly
+# spent on output.
+# Run from the repository root: python -m benchmarks.bench_output [n]
+import contextlib
+import resource
+import sys
+import tempfile
+import time
+
+from interpreterv2 import Interpreter
+from output_sink import OutputSink
+
+PROGRAM = """
+func main() {
+  var i;
+  for (i = 0; i < %d; i = i + 1) {
+    print("line ", i);
+  }
+}
+"""
+
+
+def run(program, out, output_sink):
+    interpreter = Interpreter(exec_mode="python", output_sink=output_sink)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        interpreter.run(program)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(interpreter.get_output())
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    program = PROGRAM % n
+    configs = [
+        ("print per line", lambda out: None),
+        ("sink, full log", lambda out: OutputSink(out)),
+        ("sink, last 1000 lines", lambda out: OutputSink(out, max_log_lines=1000)),
+        ("sink, no log", lambda out: OutputSink(out, max_log_lines=0)),
+    ]
+    for name, make_sink in configs:
+        with tempfile.TemporaryFile("w+") as out:
+            elapsed, logged = run(program, out, make_sink(out))
+            out.seek(0)
+            written = sum(1 for _ in out)
+        print(
+            f"{name:<22} {elapsed:7.3f} s  {n / elapsed / 1e6:5.2f} M lines/s  "
+            f"written {written}, logged {logged}"
+        )
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+    print(f"peak memory: {max_rss} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Times tree-walker loops whose bodies enter a block scope on every iteration: one
+# body declares no variables, so it shares the enclosing scope; the other declares
+# one, so it pushes a fresh scope dict on every iteration. Best of 5 runs.
+# Run from the repository root: python -m benchmarks.bench_scopes [n]
+import sys
+import timeit
+
+from interpreterv2 import Interpreter
+
+NO_VARS = """
+func main() {
+  var i;
+  var s;
+  s = 0;
+  for (i = 0; i < %d; i = i + 1) {
+    if (i > 0) {
+      s = s + 1;
+    }
+  }
+  print(s);
+}
+"""
+
+WITH_VARS = """
+func main() {
+  var i;
+  var s;
+  s = 0;
+  for (i = 0; i < %d; i = i + 1) {
+    var t;
+    t = i;
+    if (i > 0) {
+      var u;
+      s = s + 1;
+    }
+  }
+  print(s);
+}
+"""
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for name, program in (("no vars", NO_VARS), ("with vars", WITH_VARS)):
+        interpreter = Interpreter(console_output=False)
+        elapsed = min(timeit.repeat(lambda: interpreter.run(program % n), number=1, repeat=5))
+        print(f"{name:<10} {elapsed:7.3f} s  {elapsed / n * 1e9:6.0f} ns/iteration")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Measures the cold start of the interpreter in fresh processes: importing
+# interpreterv2, and importing it and running a one-line program, with the parser
+# tables either loaded directly (the default) or checked against the grammar
+# (BREWIN_CHECK_TABLES=1).
+# Run from the repository root: python -m benchmarks.bench_startup [runs]
+import os
+import statistics
+import subprocess
+import sys
+
+# each snippet prints how long its own work took, leaving out interpreter startup
+IMPORT = """
+import time
+start = time.perf_counter()
+import interpreterv2
+print(time.perf_counter() - start)
+"""
+RUN = """
+import time
+start = time.perf_counter()
+from interpreterv2 import Interpreter
+Interpreter().run("func main() { print(1); }")
+print(time.perf_counter() - start)
+"""
+
+
+def cold_start(code, runs, check_tables):
+    env = dict(os.environ, BREWIN_CHECK_TABLES="1" if check_tables else "0")
+    times = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True
+        )
+        times.append(float(result.stdout.split()[-1]))
+    return statistics.median(times)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"median of {runs} fresh processes")
+    for check_tables in (False, True):
+        mode = "checked tables" if check_tables else "pregenerated tables"
+        import_time = cold_start(IMPORT, runs, check_tables)
+        run_time = cold_start(RUN, runs, check_tables)
+        print(f"{mode}:")
+        print(f"  import interpreterv2:  {import_time * 1000:8.1f} ms")
+        print(f"  import and run:        {run_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
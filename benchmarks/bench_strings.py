@@ -0,0 +1,38 @@
+# Builds a string with s = s + "..." in a loop for growing n in every execution mode
+# but python, then compares it once. With ConcatValue strings the time grows linearly
+# with n; copying the whole string on every + would make it quadratic. The python mode
+# uses plain Python strs, so it isn't included.
+# Run from the repository root: python -m benchmarks.bench_strings [max_n]
+import sys
+import time
+
+from interpreterv2 import Interpreter
+
+PROGRAM = """
+func main() {
+  var i;
+  var s;
+  s = "";
+  for (i = 0; i < %d; i = i + 1) {
+    s = s + "0123456789";
+  }
+  print(s == s);
+}
+"""
+
+
+def main():
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else 400_000
+    for exec_mode in ("tree", "closure", "bytecode"):
+        n = max_n // 8
+        while n <= max_n:
+            interpreter = Interpreter(console_output=False, exec_mode=exec_mode)
+            start = time.perf_counter()
+            interpreter.run(PROGRAM % n)
+            elapsed = time.perf_counter() - start
+            print(f"{exec_mode:<10} n={n:<8} {n * 10 / 1e6:5.1f} MB  {elapsed:7.3f} s")
+            n *= 2
+
+
+if __name__ == "__main__":
+    main()
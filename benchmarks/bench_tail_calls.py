@@ -0,0 +1,42 @@
+# Runs a tail-recursive sum in every execution mode. Each call of sum is a
+# `return sum(...)`, which runs as a tail call, so the recursion takes constant stack
+# and memory whatever its depth.
+# Run from the repository root: python -m benchmarks.bench_tail_calls [n]
+import resource
+import sys
+import time
+
+from interpreterv2 import Interpreter
+
+PROGRAM = """
+func sum(n, acc) {
+  if (n == 0) {
+    return acc;
+  }
+  return sum(n - 1, acc + n);
+}
+
+func main() {
+  print(sum(%d, 0));
+}
+"""
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    for exec_mode in sorted(Interpreter.EXEC_MODES):
+        interpreter = Interpreter(console_output=False, exec_mode=exec_mode)
+        start = time.perf_counter()
+        try:
+            interpreter.run(PROGRAM % n)
+            result = interpreter.get_output()[-1]
+        except Exception as e:
+            result = str(e)
+        elapsed = time.perf_counter() - start
+        print(f"{exec_mode:<10} {elapsed:8.2f} s  {result}")
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+    print(f"peak memory: {max_rss} MB")
+
+
+if __name__ == "__main__":
+    main()
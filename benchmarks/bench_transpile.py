@@ -0,0 +1,54 @@
+# Runs a loop-heavy program in every execution mode. In the python mode the first run
+# includes transpiling and compiling the program; later runs of the same program text
+# reuse the cached code object.
+# Run from the repository root: python -m benchmarks.bench_transpile [n]
+import sys
+import time
+
+from interpreterv2 import Interpreter
+
+PROGRAM = """
+func collatz_steps(n) {
+  var steps;
+  steps = 0;
+  for (steps = 0; n != 1; steps = steps + 1) {
+    if (n / 2 * 2 == n) {
+      n = n / 2;
+    } else {
+      n = 3 * n + 1;
+    }
+  }
+  return steps;
+}
+
+func main() {
+  var i;
+  var total;
+  total = 0;
+  for (i = 1; i < %d; i = i + 1) {
+    total = total + collatz_steps(i);
+  }
+  print(total);
+}
+"""
+
+
+def run(exec_mode, program):
+    interpreter = Interpreter(console_output=False, exec_mode=exec_mode)
+    start = time.perf_counter()
+    interpreter.run(program)
+    return time.perf_counter() - start, interpreter.get_output()[-1]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    program = PROGRAM % n
+    for exec_mode in sorted(Interpreter.EXEC_MODES):
+        elapsed, result = run(exec_mode, program)
+        print(f"{exec_mode:<10} {elapsed:8.3f} s  {result}")
+    elapsed, result = run("python", program)
+    print(f"{'python':<10} {elapsed:8.3f} s  {result}  (cached code)")
+
+
+if __name__ == "__main__":
+    main()
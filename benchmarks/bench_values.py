@@ -0,0 +1,47 @@
+# Counts the Value objects allocated while running every program in tests/.
+# Run from the repository root: python -m benchmarks.bench_values
+import glob
+
+from interpreterv2 import Interpreter
+from type_valuev1 import Value
+
+
+def count_allocations(exec_mode, programs):
+    count = 0
+    original_init = Value.__init__
+
+    def counting_init(self, *args, **kwargs):
+        nonlocal count
+        count += 1
+        original_init(self, *args, **kwargs)
+
+    Value.__init__ = counting_init
+    try:
+        for program, inp in programs:
+            interpreter = Interpreter(console_output=False, inp=inp, exec_mode=exec_mode)
+            interpreter.run(program)
+    finally:
+        Value.__init__ = original_init
+    return count
+
+
+def load_programs():
+    programs = []
+    for path in sorted(glob.glob("tests/*.br")):
+        with open(path) as f:
+            program = f.read()
+        inp = None
+        if "*IN*" in program:
+            inp = program.split("*IN*")[1].strip().split("\n")
+        programs.append((program, inp))
+    return programs
+
+
+def main():
+    programs = load_programs()
+    for exec_mode in sorted(Interpreter.EXEC_MODES):
+        print(f"{exec_mode:<10} {count_allocations(exec_mode, programs):>8} Values")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# Generators for large synthetic Brewin programs used by the benchmarks
+
+
+# A program of roughly num_lines lines: many small functions mixing declarations,
+# arithmetic, comparisons, if/else, for loops and calls, plus a main that calls them
+def generate_program(num_lines):
+    lines = []
+    func_index = 0
+    while len(lines) < num_lines:
+        lines.append(f"func f{func_index}(a, b) {{")
+        lines.append("  var x;")
+        lines.append("  var s;")
+        lines.append('  s = "f" + "' + str(func_index) + '";')
+        lines.append("  x = (a + 3) * (b - 2) / 7;")
+        lines.append("  if (x > a && !(b == 0)) {")
+        lines.append("    x = x - a;")
+        lines.append("  } else {")
+        lines.append("    x = -x + b;")
+        lines.append("  }")
+        lines.append("  var i;")
+        lines.append("  for (i = 0; i < 3; i = i + 1) {")
+        lines.append("    x = x + i;")
+        lines.append("  }")
+        lines.append("  return x;")
+        lines.append("}")
+        func_index += 1
+    lines.append("func main() {")
+    for i in range(0, func_index, max(1, func_index // 100)):
+        lines.append(f"  print(f{i}({i}, 5));")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
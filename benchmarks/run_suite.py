@@ -0,0 +1,148 @@
+# Runs the workloads in workloads.py and times parsing and running separately. Each
+# phase is repeated and summarized by its min, median, mean and standard deviation;
+# regressions are judged on the min, which is the most stable on a noisy machine.
+# Run time excludes parsing: programs run with an ASTCache that already holds their
+# AST. In the python execution mode it includes compiling, except for repeats, which
+# reuse the compiled program like a long-running process would.
+# Results can be written to a JSON file and compared with the results of an earlier
+# run, flagging phases that got slower than the threshold (a fraction, default 0.25).
+# Run from the repository root:
+#   python -m benchmarks.run_suite [-r repeats] [-m exec_mode] [-s scale]
+#       [-o results.json] [-b baseline.json] [-t threshold] [workload ...]
+# e.g. save a baseline with -o baseline.json, then after a change pass -b baseline.json.
+# Exits with status 1 if a regression was found.
+import json
+import platform
+import statistics
+import sys
+import time
+
+from ast_cache import ASTCache
+from brewparse import parse_program
+from interpreterv2 import Interpreter
+
+from .workloads import WORKLOADS
+
+PHASES = ("parse", "run")
+# parsing one workload takes under a millisecond, so each parse sample is the
+# average of this many parses
+PARSES_PER_SAMPLE = 20
+
+
+def summarize(times):
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def measure(workload, exec_mode, repeats, scale):
+    program = workload.program(scale)
+    parse_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(PARSES_PER_SAMPLE):
+            parse_program(program)
+        parse_times.append((time.perf_counter() - start) / PARSES_PER_SAMPLE)
+
+    ast_cache = ASTCache()
+    ast_cache.parse(program)
+    run_times = []
+    for _ in range(repeats):
+        interpreter = Interpreter(
+            console_output=False,
+            inp=workload.make_inputs(scale),
+            exec_mode=exec_mode,
+            ast_cache=ast_cache,
+        )
+        start = time.perf_counter()
+        interpreter.run(program)
+        run_times.append(time.perf_counter() - start)
+
+    return {
+        "size": workload.scaled_size(scale),
+        "output_lines": len(interpreter.get_output()),
+        "parse": summarize(parse_times),
+        "run": summarize(run_times),
+    }
+
+
+# Returns (workload, phase, baseline min, current min) for every phase that got
+# slower by more than threshold
+def find_regressions(results, baseline, threshold):
+    regressions = []
+    for name, result in results["workloads"].items():
+        old = baseline["workloads"].get(name)
+        if old is None or old["size"] != result["size"]:
+            continue
+        for phase in PHASES:
+            old_min = old[phase]["min"]
+            new_min = result[phase]["min"]
+            if new_min > old_min * (1 + threshold):
+                regressions.append((name, phase, old_min, new_min))
+    return regressions
+
+
+def print_table(results, baseline):
+    print(f"{'workload':<18} {'parse min':>10} {'run min':>10} {'run median':>11} {'run stdev':>10}", end="")
+    print("  run vs baseline" if baseline else "")
+    for name, result in results["workloads"].items():
+        run = result["run"]
+        line = (
+            f"{name:<18} {result['parse']['min'] * 1000:8.2f}ms {run['min'] * 1000:8.2f}ms "
+            f"{run['median'] * 1000:9.2f}ms {run['stdev'] * 1000:8.2f}ms"
+        )
+        old = baseline["workloads"].get(name) if baseline else None
+        if old is not None and old["size"] == result["size"]:
+            line += f"  {run['min'] / old['run']['min']:6.2f}x"
+        elif baseline:
+            line += "  (not in baseline)"
+        print(line)
+
+
+def main(argv):
+    options = {"-r": 5, "-m": "tree", "-s": 1.0, "-o": None, "-b": None, "-t": 0.25}
+    while argv and argv[0] in options:
+        options[argv[0]] = argv[1]
+        argv = argv[2:]
+    repeats = int(options["-r"])
+    scale = float(options["-s"])
+    workloads = [w for w in WORKLOADS if not argv or w.name in argv]
+
+    results = {
+        "exec_mode": options["-m"],
+        "repeats": repeats,
+        "scale": scale,
+        "python": platform.python_version(),
+        "workloads": {},
+    }
+    for workload in workloads:
+        results["workloads"][workload.name] = measure(workload, options["-m"], repeats, scale)
+
+    baseline = None
+    if options["-b"] is not None:
+        with open(options["-b"]) as f:
+            baseline = json.load(f)
+        if baseline["exec_mode"] != results["exec_mode"]:
+            print(f"baseline was run in {baseline['exec_mode']} mode, not checking for regressions")
+    print_table(results, baseline)
+
+    if options["-o"] is not None:
+        with open(options["-o"], "w") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline is None or baseline["exec_mode"] != results["exec_mode"]:
+        return 0
+    regressions = find_regressions(results, baseline, float(options["-t"]))
+    for name, phase, old_min, new_min in regressions:
+        print(
+            f"REGRESSION {name} {phase}: {old_min * 1000:.2f} ms -> {new_min * 1000:.2f} ms "
+            f"({new_min / old_min:.2f}x)"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,192 @@
+# Brewin programs for the benchmark suite (see run_suite.py), each exercising one hot
+# path of the interpreter. Programs are templates taking a size, which is scaled so
+# that every workload runs for a similar time at scale 1.
+
+
+class Workload:
+    # template: program text with a single %d for the size
+    # size: size at scale 1
+    # inputs: function from the size to the inputs of the program, or None
+    def __init__(self, name, template, size, inputs=None):
+        self.name = name
+        self.template = template
+        self.size = size
+        self.inputs = inputs
+
+    def program(self, scale=1.0):
+        return self.template % self.scaled_size(scale)
+
+    # a fresh input source for every run, since runs consume it
+    def make_inputs(self, scale=1.0):
+        if self.inputs is None:
+            return None
+        return self.inputs(self.scaled_size(scale))
+
+    def scaled_size(self, scale):
+        return max(1, int(self.size * scale))
+
+
+FACT = """
+func fact(n) {
+  if (n <= 1) {
+    return 1;
+  }
+  return n * fact(n - 1);
+}
+
+func main() {
+  var i;
+  var total;
+  total = 0;
+  for (i = 0; i < %d; i = i + 1) {
+    total = total + fact(20);
+  }
+  print(total);
+}
+"""
+
+FIB = """
+func fib(n) {
+  if (n < 2) {
+    return n;
+  }
+  return fib(n - 1) + fib(n - 2);
+}
+
+func main() {
+  var i;
+  var total;
+  total = 0;
+  for (i = 0; i < %d; i = i + 1) {
+    total = total + fib(12);
+  }
+  print(total);
+}
+"""
+
+NESTED_LOOPS = """
+func main() {
+  var i;
+  var j;
+  var n;
+  var total;
+  n = %d;
+  total = 0;
+  for (i = 0; i < n; i = i + 1) {
+    for (j = 0; j < n; j = j + 1) {
+      total = total + (i * j - i / 3) * 2;
+    }
+  }
+  print(total);
+}
+"""
+
+STRING_CONCAT = """
+func main() {
+  var i;
+  var s;
+  s = "";
+  for (i = 0; i < %d; i = i + 1) {
+    s = s + "ab";
+  }
+  print(s == "");
+}
+"""
+
+DEEP_SCOPES = """
+func main() {
+  var i;
+  var x;
+  x = 0;
+  for (i = 0; i < %d; i = i + 1) {
+    var a;
+    a = i;
+    if (a >= 0) {
+      var b;
+      b = a + 1;
+      if (b > 0) {
+        var c;
+        c = b + 1;
+        if (c > 0) {
+          var a;
+          a = c + x;
+          if (a > 0) {
+            var d;
+            d = a - c;
+            x = d + b - x;
+          }
+        }
+      }
+    }
+  }
+  print(x);
+}
+"""
+
+OVERLOADED_CALLS = """
+func f() {
+  return 1;
+}
+
+func f(a) {
+  return a + 1;
+}
+
+func f(a, b) {
+  return a + b;
+}
+
+func f(a, b, c) {
+  return f(a, b) + f(c);
+}
+
+func main() {
+  var i;
+  var total;
+  total = 0;
+  for (i = 0; i < %d; i = i + 1) {
+    total = total + f() + f(i) + f(i, 2) + f(i, 2, 3);
+  }
+  print(total);
+}
+"""
+
+HEAVY_PRINT = """
+func main() {
+  var i;
+  for (i = 0; i < %d; i = i + 1) {
+    print("line ", i, ": ", i * 2, " ", i > 5, " done");
+  }
+}
+"""
+
+INPUTI_STREAM = """
+func main() {
+  var n;
+  var i;
+  var total;
+  n = %d;
+  total = 0;
+  for (i = 0; i < n; i = i + 1) {
+    total = total + inputi();
+  }
+  print(total);
+}
+"""
+
+
+def stream_numbers(n):
+    for i in range(n):
+        yield str(i)
+
+
+WORKLOADS = [
+    Workload("fact", FACT, 2_000),
+    Workload("fib", FIB, 50),
+    Workload("nested_loops", NESTED_LOOPS, 150),
+    Workload("string_concat", STRING_CONCAT, 20_000),
+    Workload("deep_scopes", DEEP_SCOPES, 10_000),
+    Workload("overloaded_calls", OVERLOADED_CALLS, 5_000),
+    Workload("heavy_print", HEAVY_PRINT, 20_000),
+    Workload("inputi_stream", INPUTI_STREAM, 20_000, stream_numbers),
+]
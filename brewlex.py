@@ -1,5 +1,5 @@
 
-from ply import lex
+import os
 
 reserved = (
     "VAR",
@@ -129,8 +129,37 @@ def t_error(t):
     print(f"Illegal character {t.value[0]}")
     t.lexer.skip(1)
 
-def reset_lineno():
-    lexer.lineno = 1
-
-# Build the lexer
-lexer = lex.lex()
+# The lexer is built on first use, and cloned by every brewparse.Parser. By default
+# it is loaded from the pregenerated lextab.py without validating the token rules
+# above; after editing them, run with BREWIN_CHECK_TABLES=1 once to validate the
+# rules and regenerate lextab.py.
+CHECK_TABLES = os.environ.get("BREWIN_CHECK_TABLES") == "1"
+LEXTAB = "lextab"
+lexer = None
+
+
+def get_lexer():
+    global lexer
+    if lexer is None:
+        lexer = build_lexer()
+    return lexer
+
+
+def build_lexer():
+    # imported here so that importing this module does not load ply
+    from ply import lex
+
+    if not CHECK_TABLES:
+        try:
+            new_lexer = lex.Lexer()
+            new_lexer.lexoptimize = True
+            new_lexer.readtab(LEXTAB, globals())
+            return new_lexer
+        except ImportError:
+            # no table yet, or one written by another version of ply
+            pass
+    # lex reflects over the globals of its caller: the rules must be seen in
+    # definition order, which passing module= would not preserve
+    new_lexer = lex.lex()
+    new_lexer.writetab(LEXTAB, os.path.dirname(os.path.abspath(__file__)))
+    return new_lexer
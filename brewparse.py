@@ -1,7 +1,8 @@
+import threading
+
 from element import Element
 from brewlex import *
 from intbase import InterpreterBase
-from ply import yacc
 
 # Parsing rules
 
@@ -254,6 +255,8 @@ def p_expression_args(p):
     collapse_items(p, 1, 3)
 
 
+# ply requires an error rule to build the tables; parsing reports errors through
+# Parser instead
 def p_error(p):
     if p:
         print(f"Syntax error at '{p.value}' on line {p.lineno}")
@@ -261,14 +264,81 @@ def p_error(p):
         print("Syntax error at EOF")
 
 
-# exported function
-def parse_program(program):
-    reset_lineno()
-    ast = yacc.parse(program)
-    if ast is None:
-        raise SyntaxError("Syntax error")
-    return ast
+# The parser tables are loaded on first use. By default they come from the
+# pregenerated parsetab.py, without reflecting over the rules above or checking the
+# grammar signature; after editing the grammar, run with BREWIN_CHECK_TABLES=1 once to
+# regenerate parsetab.py. The tables are only read while parsing, so every Parser
+# shares them.
+PARSETAB = "parsetab"
+table = None
+table_lock = threading.Lock()
+
+
+def get_table():
+    global table
+    with table_lock:
+        if table is None:
+            table = build_table()
+    return table
+
+
+def build_table():
+    # imported here so that importing this module does not load ply
+    from ply import yacc
+
+    new_table = yacc.LRTable()
+    if not CHECK_TABLES:
+        try:
+            new_table.read_table(PARSETAB)
+            new_table.bind_callables(globals())
+            return new_table
+        except (ImportError, yacc.VersionError):
+            # no table yet, or one written by another version of ply
+            pass
+    generated = yacc.yacc(tabmodule=PARSETAB)
+    new_table.lr_productions = generated.productions
+    new_table.lr_action = generated.action
+    new_table.lr_goto = generated.goto
+    return new_table
+
+
+# A lexer and LR parser with their own state over the shared tables. A Parser can
+# parse any number of programs, one at a time; parse_program keeps one per thread.
+class Parser:
+    def __init__(self):
+        from ply import yacc
+
+        self.lexer = get_lexer().clone()
+        self.lr_parser = yacc.LRParser(get_table(), self.__error)
+        # message of the first syntax error in the program being parsed
+        self.error = None
+
+    def parse(self, program):
+        self.lexer.lineno = 1
+        self.error = None
+        ast = self.lr_parser.parse(program, lexer=self.lexer)
+        if self.error is not None:
+            raise SyntaxError(self.error)
+        if ast is None:
+            raise SyntaxError("Syntax error")
+        return ast
+
+    # ply keeps parsing after an error to look for more; only the first is reported
+    def __error(self, p):
+        if self.error is not None:
+            return
+        if p:
+            self.error = f"Syntax error at '{p.value}' on line {p.lineno}"
+        else:
+            self.error = f"Syntax error at EOF on line {self.lexer.lineno}"
+
+
+local_parsers = threading.local()
 
 
-# generate our parser
-yacc.yacc() # yacc.yacc(debug=True, debuglog=open("parse.log", "w"))
+# exported function
+def parse_program(program):
+    parser = getattr(local_parsers, "parser", None)
+    if parser is None:
+        parser = local_parsers.parser = Parser()
+    return parser.parse(program)
@@ -0,0 +1,485 @@
+# A stack-based bytecode backend for Brewin.
+# BytecodeCompiler turns each FUNC_NODE in the function table into a FunctionCode: a
+# flat instruction array of (opcode, arg) pairs plus a constant pool that the args
+# index into. VirtualMachine runs a FunctionCode with a single dispatch loop and an
+# operand stack, so neither evaluating an expression tree nor calling a function
+# recurses through Python frames the way __eval_expr/__call_func do. Use
+# disassemble() to inspect the generated code.
+# Variables are resolved to frame slots at compile time (see resolver_v2.py); only
+# names a function doesn't declare itself are looked up by name at run time.
+# HOOK instructions are only emitted for trace events that have hooks registered.
+from env_v1 import UNBOUND
+from resolver_v2 import FunctionResolver
+from type_valuev1 import (
+    Type,
+    Value,
+    NIL_VALUE,
+    TRUE_VALUE,
+    FALSE_VALUE,
+    LITERAL_VALUES,
+    get_printable,
+    int_value,
+)
+from intbase import InterpreterBase, ErrorType
+
+# Opcodes. Every instruction takes one integer argument (0 if unused).
+LOAD_CONST = 0  # push consts[arg]
+LOAD_LOCAL = 1  # push the variable in frame slot arg
+STORE_LOCAL = 2  # pop a value into frame slot arg
+LOAD_DYNAMIC = 3  # push the value of caller variable consts[arg]
+STORE_DYNAMIC = 4  # pop a value and assign it to caller variable consts[arg]
+DEF_VAR = 5  # define the variable in frame slot arg, initialized to 0
+UNBIND = 6  # frame slot arg goes out of scope
+BINARY_OP = 7  # pop right, pop left, push left <consts[arg]> right
+UNARY_OP = 8  # pop operand, push <consts[arg]> operand
+JUMP = 9  # jump to instruction index arg
+JUMP_IF_FALSE = 10  # pop the bool condition of an if, jump to arg if it is false
+CALL = 11  # pop the arguments of function consts[arg], run it, push its return value
+CALL_PRINT = 12  # pop arg values, print them, push nil
+CALL_INPUT = 13  # consts[arg] is (function name, has prompt); push the input
+CALL_ERROR = 14  # call to an unknown function consts[arg]
+DUPLICATE_VAR = 15  # redefinition of variable consts[arg] in the same block
+POP = 16
+RETURN = 17  # pop the return value and return it
+HOOK = 18  # consts[arg] is (event, args); fire the event's trace hooks
+TAIL_CALL = 19  # pop the arguments of function consts[arg], return by running it
+LOOP_IF_FALSE = 20  # JUMP_IF_FALSE for the condition of a for loop
+
+OPCODE_NAMES = [
+    "LOAD_CONST",
+    "LOAD_LOCAL",
+    "STORE_LOCAL",
+    "LOAD_DYNAMIC",
+    "STORE_DYNAMIC",
+    "DEF_VAR",
+    "UNBIND",
+    "BINARY_OP",
+    "UNARY_OP",
+    "JUMP",
+    "JUMP_IF_FALSE",
+    "CALL",
+    "CALL_PRINT",
+    "CALL_INPUT",
+    "CALL_ERROR",
+    "DUPLICATE_VAR",
+    "POP",
+    "RETURN",
+    "HOOK",
+    "TAIL_CALL",
+    "LOOP_IF_FALSE",
+]
+
+
+# Compiled form of one Brewin function
+class FunctionCode:
+    def __init__(self, name, num_args):
+        self.name = name
+        self.num_args = num_args
+        # flat list: opcode, arg, opcode, arg, ...
+        self.code = []
+        self.consts = []
+        self.__const_index = {}
+        # frame layout, filled in by the compiler
+        self.num_slots = 0
+        self.slot_names = []
+        self.slots_by_name = {}
+        self.param_slots = ()
+        # the FUNC_NODE keying the memo cache, for pure functions when memoization is
+        # on (see memo_cache.py)
+        self.memo_node = None
+
+    def emit(self, opcode, arg=0):
+        self.code.append(opcode)
+        self.code.append(arg)
+        return len(self.code) - 2
+
+    # position of the next instruction, used as a jump target
+    def here(self):
+        return len(self.code)
+
+    def patch(self, pos, target):
+        self.code[pos + 1] = target
+
+    # Add an object to the constant pool, reusing the slot of an equal constant.
+    # Values are keyed by type and value so that 1 and true don't share a slot.
+    def add_const(self, const):
+        key = (const.type(), const.value()) if isinstance(const, Value) else const
+        if key not in self.__const_index:
+            self.consts.append(const)
+            self.__const_index[key] = len(self.consts) - 1
+        return self.__const_index[key]
+
+
+class BytecodeCompiler:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.func_table = interpreter.func_name_to_ast
+        self.hooks = interpreter.hooks
+        # (function name, num_args) -> FunctionCode
+        self.functions = {}
+        self.binary_ops = interpreter.BINARY_OPS
+
+    def compile_program(self):
+        # create every FunctionCode first so calls can be linked to functions
+        # defined later in the file
+        for func_name, overloads in self.func_table.items():
+            for num_args in overloads:
+                self.functions[(func_name, num_args)] = FunctionCode(func_name, num_args)
+        for (func_name, num_args), func_code in self.functions.items():
+            func_node = self.func_table[func_name][num_args]
+            self.resolver = FunctionResolver(func_node)
+            self.__compile_statements(func_code, func_node.get("statements"))
+            # falling off the end of a function returns nil
+            func_code.emit(LOAD_CONST, func_code.add_const(NIL_VALUE))
+            func_code.emit(RETURN)
+            func_code.num_slots = self.resolver.num_slots()
+            func_code.slot_names = self.resolver.slot_names
+            func_code.slots_by_name = self.resolver.slots_by_name()
+            func_code.param_slots = self.resolver.param_slots
+            if func_node in self.interpreter.memoized_funcs:
+                func_code.memo_node = func_node
+        return self.functions
+
+    def __emit_hook(self, func_code, event, *args):
+        if self.hooks[event]:
+            func_code.emit(HOOK, func_code.add_const((event, args)))
+
+    # Statements
+
+    def __compile_statements(self, func_code, statements):
+        for statement in statements:
+            self.__emit_hook(func_code, "statement", statement)
+            if statement.elem_type == InterpreterBase.FCALL_NODE:
+                self.__compile_call(func_code, statement)
+                func_code.emit(POP)
+            elif statement.elem_type == "=":
+                self.__compile_assign(func_code, statement)
+            elif statement.elem_type == InterpreterBase.VAR_DEF_NODE:
+                self.__compile_var_def(func_code, statement)
+            elif statement.elem_type == InterpreterBase.IF_NODE:
+                self.__compile_if(func_code, statement)
+            elif statement.elem_type == InterpreterBase.FOR_NODE:
+                self.__compile_for(func_code, statement)
+            elif statement.elem_type == InterpreterBase.RETURN_NODE:
+                self.__compile_return(func_code, statement)
+
+    # Compile the block of an if or for node. The block's variables are unbound when
+    # it completes, so callers can't see them any more.
+    def __compile_block(self, func_code, node, statements):
+        self.__emit_hook(func_code, "scope_enter", node)
+        self.resolver.enter_block()
+        self.__compile_statements(func_code, statements)
+        for slot in self.resolver.exit_block():
+            func_code.emit(UNBIND, slot)
+
+    def __compile_assign(self, func_code, assign_node):
+        var_name = assign_node.get("name")
+        self.__compile_expr(func_code, assign_node.get("expression"))
+        # the assign hook receives the value on top of the stack as well
+        self.__emit_hook(func_code, "assign", var_name)
+        slot = self.resolver.resolve(var_name)
+        if slot is not None:
+            func_code.emit(STORE_LOCAL, slot)
+        else:
+            func_code.emit(STORE_DYNAMIC, func_code.add_const(var_name))
+
+    def __compile_var_def(self, func_code, var_node):
+        var_name = var_node.get("name")
+        slot = self.resolver.declare(var_name)
+        if slot is not None:
+            func_code.emit(DEF_VAR, slot)
+        else:
+            func_code.emit(DUPLICATE_VAR, func_code.add_const(var_name))
+
+    def __compile_if(self, func_code, if_node):
+        self.__compile_expr(func_code, if_node.get("condition"))
+        jump_to_else = func_code.emit(JUMP_IF_FALSE)
+        self.__compile_block(func_code, if_node, if_node.get("statements"))
+        else_statements = if_node.get("else_statements")
+        if else_statements is None:
+            func_code.patch(jump_to_else, func_code.here())
+            return
+        jump_to_end = func_code.emit(JUMP)
+        func_code.patch(jump_to_else, func_code.here())
+        self.__compile_block(func_code, if_node, else_statements)
+        func_code.patch(jump_to_end, func_code.here())
+
+    def __compile_for(self, func_code, for_node):
+        # the tree walker also enters a scope around the whole loop
+        self.__emit_hook(func_code, "scope_enter", for_node)
+        self.__compile_assign(func_code, for_node.get("init"))
+        loop_start = func_code.here()
+        self.__compile_expr(func_code, for_node.get("condition"))
+        jump_to_end = func_code.emit(LOOP_IF_FALSE)
+        self.__compile_block(func_code, for_node, for_node.get("statements"))
+        self.__compile_assign(func_code, for_node.get("update"))
+        func_code.emit(JUMP, loop_start)
+        func_code.patch(jump_to_end, func_code.here())
+
+    def __compile_return(self, func_code, return_node):
+        expression = return_node.get("expression")
+        if expression is None:
+            func_code.emit(LOAD_CONST, func_code.add_const(NIL_VALUE))
+        elif (
+            expression.elem_type == InterpreterBase.FCALL_NODE
+            and (expression.get("name"), len(expression.get("args")))
+            in self.interpreter.tail_callable
+        ):
+            self.__compile_call(func_code, expression, tail=True)
+            return
+        else:
+            self.__compile_expr(func_code, expression)
+        func_code.emit(RETURN)
+
+    # Expressions
+
+    def __compile_expr(self, func_code, expr_node):
+        elem_type = expr_node.elem_type
+        if elem_type in LITERAL_VALUES:
+            value = LITERAL_VALUES[elem_type](expr_node.get("val"))
+            func_code.emit(LOAD_CONST, func_code.add_const(value))
+        elif elem_type == InterpreterBase.VAR_NODE:
+            var_name = expr_node.get("name")
+            slot = self.resolver.resolve(var_name)
+            if slot is not None:
+                func_code.emit(LOAD_LOCAL, slot)
+            else:
+                func_code.emit(LOAD_DYNAMIC, func_code.add_const(var_name))
+        elif elem_type == InterpreterBase.FCALL_NODE:
+            self.__compile_call(func_code, expr_node)
+        elif elem_type in self.binary_ops:
+            self.__compile_expr(func_code, expr_node.get("op1"))
+            self.__compile_expr(func_code, expr_node.get("op2"))
+            func_code.emit(BINARY_OP, func_code.add_const(elem_type))
+        elif elem_type in (InterpreterBase.NEG_NODE, InterpreterBase.NOT_NODE):
+            self.__compile_expr(func_code, expr_node.get("op1"))
+            func_code.emit(UNARY_OP, func_code.add_const(elem_type))
+        else:
+            # the tree walker evaluates unsupported expressions to None
+            func_code.emit(LOAD_CONST, func_code.add_const(None))
+
+    # tail: the call is returned from a function, and the callee is one of the
+    # interpreter's tail_callable functions
+    def __compile_call(self, func_code, call_node, tail=False):
+        self.__emit_hook(func_code, "call", call_node)
+        func_name = call_node.get("name")
+        args = call_node.get("args")
+        if func_name == "print":
+            for arg in args:
+                self.__compile_expr(func_code, arg)
+            func_code.emit(CALL_PRINT, len(args))
+            return
+        if func_name in ["inputi", "inputs"]:
+            if len(args) > 1:
+                func_code.emit(CALL_ERROR, func_code.add_const(func_name))
+                return
+            if len(args) == 1:
+                self.__compile_expr(func_code, args[0])
+            func_code.emit(CALL_INPUT, func_code.add_const((func_name, len(args) == 1)))
+            return
+        key = (func_name, len(args))
+        if key not in self.functions:
+            func_code.emit(CALL_ERROR, func_code.add_const(func_name))
+            return
+        for arg in args:
+            self.__compile_expr(func_code, arg)
+        self.__emit_hook(func_code, "scope_enter", self.func_table[func_name][len(args)])
+        func_code.emit(TAIL_CALL if tail else CALL, func_code.add_const(self.functions[key]))
+
+
+class VirtualMachine:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.frames = interpreter.frames
+        self.op_to_lambda = interpreter.op_to_lambda
+
+    # Run a function on already evaluated arguments and return its return value.
+    # Brewin calls don't recurse in Python: CALL saves the caller's position on
+    # call_stack and continues in the callee, and RETURN resumes the caller, so the
+    # depth of Brewin recursion is only limited by the interpreter's max_call_depth.
+    def execute(self, func_code, args=()):
+        code = func_code.code
+        consts = func_code.consts
+        frames = self.frames
+        op_to_lambda = self.op_to_lambda
+        error = self.interpreter.error
+        max_call_depth = self.interpreter.max_call_depth
+        memo_cache = self.interpreter.memo_cache
+        frame = self.__push_frame(func_code, args)
+        # all functions share one operand stack: a callee starts above its caller's
+        # operands and leaves just its return value there
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        # (code, consts, return pc, frame, memo cache key of the call or None) of every
+        # caller of the running function
+        call_stack = []
+        pc = 0
+        while True:
+            opcode = code[pc]
+            arg = code[pc + 1]
+            pc += 2
+            if opcode == LOAD_LOCAL:
+                push(frame[arg])
+            elif opcode == LOAD_CONST:
+                push(consts[arg])
+            elif opcode == STORE_LOCAL:
+                frame[arg] = pop()
+            elif opcode == BINARY_OP:
+                right_value_obj = pop()
+                left_value_obj = pop()
+                op = consts[arg]
+                if left_value_obj.type() != right_value_obj.type():
+                    if op == "==":
+                        push(FALSE_VALUE)
+                        continue
+                    if op == "!=":
+                        push(TRUE_VALUE)
+                        continue
+                    error(ErrorType.TYPE_ERROR, f"Incompatible types for {op} operation")
+                f = op_to_lambda[left_value_obj.type()].get(op)
+                if f is None:
+                    error(
+                        ErrorType.TYPE_ERROR,
+                        f"Incompatible operator {op} for type {left_value_obj.type()}",
+                    )
+                push(f(left_value_obj, right_value_obj))
+            elif opcode == JUMP_IF_FALSE:
+                condition = pop()
+                if condition.type() != Type.BOOL:
+                    error(ErrorType.TYPE_ERROR, "If condition does not return bool value")
+                if not condition.value():
+                    pc = arg
+            elif opcode == LOOP_IF_FALSE:
+                condition = pop()
+                if condition.type() != Type.BOOL:
+                    error(ErrorType.TYPE_ERROR, "Loop condition must evaluate to bool values")
+                if not condition.value():
+                    pc = arg
+            elif opcode == JUMP:
+                pc = arg
+            elif opcode == CALL:
+                callee = consts[arg]
+                # the callers of the running function are on call_stack, so the
+                # callee nests len(call_stack) + 1 calls deep inside main
+                if len(call_stack) >= max_call_depth:
+                    error(
+                        ErrorType.FAULT_ERROR,
+                        f"Maximum call depth of {max_call_depth} exceeded",
+                    )
+                call_args = stack[len(stack) - callee.num_args :]
+                del stack[len(stack) - callee.num_args :]
+                memo_key = None
+                if callee.memo_node is not None:
+                    memo_key = memo_cache.key(callee.memo_node, call_args)
+                    return_value = memo_cache.get(memo_key)
+                    if return_value is not None:
+                        push(return_value)
+                        continue
+                call_stack.append((code, consts, pc, frame, memo_key))
+                frame = self.__push_frame(callee, call_args)
+                code = callee.code
+                consts = callee.consts
+                pc = 0
+            elif opcode == DEF_VAR:
+                frame[arg] = int_value(0)
+            elif opcode == UNBIND:
+                frame[arg] = UNBOUND
+            elif opcode == POP:
+                pop()
+            elif opcode == TAIL_CALL:
+                # the callee replaces the running function, so the depth is unchanged
+                callee = consts[arg]
+                call_args = stack[len(stack) - callee.num_args :]
+                del stack[len(stack) - callee.num_args :]
+                frames.pop()
+                frame = self.__push_frame(callee, call_args)
+                code = callee.code
+                consts = callee.consts
+                pc = 0
+            elif opcode == RETURN:
+                frames.pop()
+                if not call_stack:
+                    return pop()
+                # the return value stays on the stack for the caller
+                code, consts, pc, frame, memo_key = call_stack.pop()
+                if memo_key is not None:
+                    memo_cache.put(memo_key, stack[-1])
+            elif opcode == UNARY_OP:
+                op1_obj = pop()
+                op = consts[arg]
+                operand_type = Type.INT if op == InterpreterBase.NEG_NODE else Type.BOOL
+                if op1_obj.type() != operand_type:
+                    error(ErrorType.TYPE_ERROR, f"Wrong type for operation {op}")
+                push(op_to_lambda[operand_type][op](op1_obj))
+            elif opcode == LOAD_DYNAMIC:
+                val = frames.get_dynamic(consts[arg])
+                if val is None:
+                    error(ErrorType.NAME_ERROR, f"Variable {consts[arg]} not found")
+                push(val)
+            elif opcode == STORE_DYNAMIC:
+                if not frames.set_dynamic(consts[arg], pop()):
+                    error(
+                        ErrorType.NAME_ERROR,
+                        f"Undefined variable {consts[arg]} in assignment",
+                    )
+            elif opcode == CALL_PRINT:
+                values = stack[len(stack) - arg :]
+                del stack[len(stack) - arg :]
+                self.interpreter.output("".join([get_printable(v) for v in values]))
+                push(NIL_VALUE)
+            elif opcode == CALL_INPUT:
+                func_name, has_prompt = consts[arg]
+                if has_prompt:
+                    self.interpreter.output(get_printable(pop()))
+                inp = self.interpreter.get_input()
+                if func_name == "inputi":
+                    push(int_value(int(inp)))
+                else:
+                    push(Value(Type.STRING, inp))
+            elif opcode == CALL_ERROR:
+                error(ErrorType.NAME_ERROR, f"Function {consts[arg]} not found")
+            elif opcode == DUPLICATE_VAR:
+                error(
+                    ErrorType.NAME_ERROR,
+                    f"Duplicate definition for variable {consts[arg]}",
+                )
+            elif opcode == HOOK:
+                event, hook_args = consts[arg]
+                if event == "assign":
+                    hook_args = hook_args + (stack[-1],)
+                self.interpreter.fire_hook(event, *hook_args)
+
+    def __push_frame(self, func_code, args):
+        frame = self.frames.push(func_code.num_slots, func_code.slots_by_name)
+        for slot, arg in zip(func_code.param_slots, args):
+            if slot is not None:
+                frame[slot] = arg
+        return frame
+
+
+def disassemble(func_code):
+    lines = [f"{func_code.name}/{func_code.num_args}:"]
+    code = func_code.code
+    for pc in range(0, len(code), 2):
+        opcode = code[pc]
+        arg = code[pc + 1]
+        line = f"{pc:6} {OPCODE_NAMES[opcode]:<14}"
+        if opcode in (JUMP, JUMP_IF_FALSE, LOOP_IF_FALSE):
+            line += f"{arg:>4} (to {arg})"
+        elif opcode in (LOAD_LOCAL, STORE_LOCAL, DEF_VAR, UNBIND):
+            line += f"{arg:>4} ({func_code.slot_names[arg]})"
+        elif opcode == CALL_PRINT:
+            line += f"{arg:>4}"
+        elif opcode not in (POP, RETURN):
+            line += f"{arg:>4} ({describe_const(func_code.consts[arg])})"
+        lines.append(line.rstrip())
+    return "\n".join(lines)
+
+
+def describe_const(const):
+    if isinstance(const, Value):
+        return f"{const.type()} {get_printable(const)}"
+    if isinstance(const, FunctionCode):
+        return f"{const.name}/{const.num_args}"
+    return str(const)
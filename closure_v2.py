@@ -0,0 +1,480 @@
+# The ClosureCompiler turns the statement lists of every function in the function
+# table into a tree of pre-bound Python closures. The tree walker in interpreterv2
+# re-dispatches on elem_type and does Element.get() lookups for every node each time
+# it runs; here that work is done once per node at compile time, so executing a
+# loop body thousands of times only costs the closure calls.
+# Every closure takes the frame of the running call (see env_v1.FrameManager), and
+# variables are resolved to frame slots while compiling (see resolver_v2.py).
+# Each compiled statement follows the same protocol as Interpreter.__run_statements:
+# it returns None to keep going, or the Value of a return statement.
+# Trace hooks are compiled in only for the events that have hooks registered.
+from env_v1 import UNBOUND, TailCall
+from resolver_v2 import FunctionResolver
+from type_valuev1 import (
+    Type,
+    Value,
+    NIL_VALUE,
+    TRUE_VALUE,
+    FALSE_VALUE,
+    LITERAL_VALUES,
+    get_printable,
+    int_value,
+)
+from intbase import InterpreterBase, ErrorType
+
+
+# A compiled Brewin function
+class CompiledFunction:
+    def __init__(self, frames, param_slots):
+        self.frames = frames
+        self.param_slots = param_slots
+        # filled in once the body has been compiled
+        self.body = None
+        self.num_slots = 0
+        self.slots_by_name = {}
+        # set for pure functions when memoization is on (see memo_cache.py)
+        self.memo_cache = None
+        self.func_node = None
+
+    # Run the function on already evaluated arguments
+    def invoke(self, args):
+        memo_cache = self.memo_cache
+        if memo_cache is None:
+            return self.__run_calls(args)
+        key = memo_cache.key(self.func_node, args)
+        return_value = memo_cache.get(key)
+        if return_value is None:
+            return_value = self.__run_calls(args)
+            memo_cache.put(key, return_value)
+        return return_value
+
+    # Run the function in a new frame, then in turn every function it tail calls
+    def __run_calls(self, args):
+        func = self
+        while True:
+            frame = func.frames.push(func.num_slots, func.slots_by_name)
+            for slot, arg in zip(func.param_slots, args):
+                if slot is not None:
+                    frame[slot] = arg
+            return_value = func.body(frame)
+            func.frames.pop()
+            if type(return_value) is not TailCall:
+                break
+            func = return_value.func
+            args = return_value.args
+        # functions without a return statement return nil
+        if return_value is None:
+            return NIL_VALUE
+        return return_value
+
+
+class ClosureCompiler:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.frames = interpreter.frames
+        self.func_table = interpreter.func_name_to_ast
+        self.hooks = interpreter.hooks
+        # (function name, num_args) -> CompiledFunction
+        self.compiled_funcs = {}
+        self.__setup_compilers()
+
+    # Compile every function in the function table and return the compiled form of
+    # the requested function. Calls are linked to CompiledFunctions before any body
+    # is compiled, so they can refer to functions defined anywhere in the file.
+    def compile_program(self, main_name="main", main_num_args=0):
+        resolvers = {}
+        for func_name, overloads in self.func_table.items():
+            for num_args, func_node in overloads.items():
+                resolver = FunctionResolver(func_node)
+                resolvers[(func_name, num_args)] = resolver
+                compiled_func = CompiledFunction(self.frames, resolver.param_slots)
+                if func_node in self.interpreter.memoized_funcs:
+                    compiled_func.memo_cache = self.interpreter.memo_cache
+                    compiled_func.func_node = func_node
+                self.compiled_funcs[(func_name, num_args)] = compiled_func
+        for key, compiled_func in self.compiled_funcs.items():
+            func_name, num_args = key
+            self.resolver = resolvers[key]
+            compiled_func.body = self.__compile_statements(
+                self.func_table[func_name][num_args].get("statements")
+            )
+            compiled_func.num_slots = self.resolver.num_slots()
+            compiled_func.slots_by_name = self.resolver.slots_by_name()
+        return self.compiled_funcs[(main_name, main_num_args)]
+
+    def __setup_compilers(self):
+        self.statement_compilers = {
+            InterpreterBase.FCALL_NODE: self.__compile_call_statement,
+            "=": self.__compile_assign,
+            InterpreterBase.VAR_DEF_NODE: self.__compile_var_def,
+            InterpreterBase.IF_NODE: self.__compile_if,
+            InterpreterBase.FOR_NODE: self.__compile_for,
+            InterpreterBase.RETURN_NODE: self.__compile_return,
+        }
+        self.expr_compilers = {
+            InterpreterBase.INT_NODE: self.__compile_const,
+            InterpreterBase.STRING_NODE: self.__compile_const,
+            InterpreterBase.BOOL_NODE: self.__compile_const,
+            InterpreterBase.NIL_NODE: self.__compile_const,
+            InterpreterBase.VAR_NODE: self.__compile_var,
+            InterpreterBase.FCALL_NODE: self.__compile_call,
+            InterpreterBase.NEG_NODE: self.__compile_unary_op,
+            InterpreterBase.NOT_NODE: self.__compile_unary_op,
+        }
+        for op in self.interpreter.BINARY_OPS:
+            self.expr_compilers[op] = self.__compile_binary_op
+
+    # Statements
+
+    def __compile_statements(self, statements):
+        compiled = []
+        for statement in statements:
+            compiler = self.statement_compilers.get(statement.elem_type)
+            # the tree walker silently skips any other kind of statement
+            if compiler is None:
+                continue
+            compiled_statement = compiler(statement)
+            if self.hooks["statement"]:
+                compiled_statement = self.__traced(statement, compiled_statement)
+            compiled.append(compiled_statement)
+        compiled = tuple(compiled)
+
+        def run_statements(frame):
+            for statement in compiled:
+                result = statement(frame)
+                if result is not None:
+                    return result
+            return None
+
+        return run_statements
+
+    # Compile the statements of the block of an if or for node. The returned closure
+    # unbinds the block's variables when it completes, so callers can't see them
+    # any more.
+    def __compile_block(self, node, statements):
+        self.resolver.enter_block()
+        run_statements = self.__compile_statements(statements)
+        block_slots = self.resolver.exit_block()
+        if block_slots:
+            run_unscoped = run_statements
+
+            def run_statements(frame):
+                result = run_unscoped(frame)
+                for slot in block_slots:
+                    frame[slot] = UNBOUND
+                return result
+
+        if self.hooks["scope_enter"]:
+            return self.__with_hook("scope_enter", (node,), run_statements)
+        return run_statements
+
+    # Fire the hooks of an event with fixed arguments before running a closure
+    def __with_hook(self, event, args, closure):
+        fire_hook = self.interpreter.fire_hook
+
+        def run_hooked(frame):
+            fire_hook(event, *args)
+            return closure(frame)
+
+        return run_hooked
+
+    def __traced(self, statement, compiled_statement):
+        return self.__with_hook("statement", (statement,), compiled_statement)
+
+    def __compile_call_statement(self, call_node):
+        call = self.__compile_call(call_node)
+
+        # the returned value of a function call statement is discarded
+        def run_call_statement(frame):
+            call(frame)
+
+        return run_call_statement
+
+    def __compile_assign(self, assign_node):
+        var_name = assign_node.get("name")
+        expr = self.__compile_expr(assign_node.get("expression"))
+        slot = self.resolver.resolve(var_name)
+        if self.hooks["assign"]:
+            fire_hook = self.interpreter.fire_hook
+            unhooked_expr = expr
+
+            def expr(frame):
+                value = unhooked_expr(frame)
+                fire_hook("assign", var_name, value)
+                return value
+
+        if slot is not None:
+
+            def run_assign(frame):
+                frame[slot] = expr(frame)
+
+            return run_assign
+
+        set_dynamic = self.frames.set_dynamic
+        error = self.interpreter.error
+
+        def run_dynamic_assign(frame):
+            if not set_dynamic(var_name, expr(frame)):
+                error(
+                    ErrorType.NAME_ERROR, f"Undefined variable {var_name} in assignment"
+                )
+
+        return run_dynamic_assign
+
+    def __compile_var_def(self, var_node):
+        var_name = var_node.get("name")
+        slot = self.resolver.declare(var_name)
+        if slot is None:
+            error = self.interpreter.error
+
+            def run_duplicate_var_def(frame):
+                error(
+                    ErrorType.NAME_ERROR, f"Duplicate definition for variable {var_name}"
+                )
+
+            return run_duplicate_var_def
+
+        def run_var_def(frame):
+            frame[slot] = int_value(0)
+
+        return run_var_def
+
+    def __compile_if(self, if_node):
+        condition = self.__compile_expr(if_node.get("condition"))
+        statements = self.__compile_block(if_node, if_node.get("statements"))
+        else_statements = if_node.get("else_statements")
+        if else_statements is not None:
+            else_statements = self.__compile_block(if_node, else_statements)
+        error = self.interpreter.error
+
+        def run_if(frame):
+            condition_result = condition(frame)
+            if condition_result.type() != Type.BOOL:
+                error(ErrorType.TYPE_ERROR, "If condition does not return bool value")
+            if condition_result.value():
+                return statements(frame)
+            if else_statements is not None:
+                return else_statements(frame)
+            return None
+
+        return run_if
+
+    def __compile_for(self, for_node):
+        init = self.__compile_assign(for_node.get("init"))
+        condition = self.__compile_expr(for_node.get("condition"))
+        update = self.__compile_assign(for_node.get("update"))
+        statements = self.__compile_block(for_node, for_node.get("statements"))
+        if self.hooks["scope_enter"]:
+            # the tree walker also enters a scope around the whole loop
+            init = self.__with_hook("scope_enter", (for_node,), init)
+        error = self.interpreter.error
+
+        def run_for(frame):
+            init(frame)
+            while True:
+                condition_result = condition(frame)
+                if condition_result.type() != Type.BOOL:
+                    error(
+                        ErrorType.TYPE_ERROR,
+                        "Loop condition must evaluate to bool values",
+                    )
+                if not condition_result.value():
+                    return None
+                result = statements(frame)
+                if result is not None:
+                    return result
+                update(frame)
+
+        return run_for
+
+    def __compile_return(self, return_node):
+        expression = return_node.get("expression")
+        if expression is None:
+            return lambda frame: NIL_VALUE
+        if expression.elem_type == InterpreterBase.FCALL_NODE:
+            key = (expression.get("name"), len(expression.get("args")))
+            if key in self.interpreter.tail_callable:
+                return self.__compile_tail_call(expression, key)
+        return self.__compile_expr(expression)
+
+    # `return f(...)` where f never looks up its callers' variables: evaluate the
+    # arguments, then leave it to CompiledFunction.invoke to run f once this frame
+    # has been popped
+    def __compile_tail_call(self, call_node, key):
+        arg_exprs = tuple(self.__compile_expr(arg) for arg in call_node.get("args"))
+        func = self.compiled_funcs[key]
+        if self.hooks["scope_enter"]:
+            fire_hook = self.interpreter.fire_hook
+            func_node = self.func_table[key[0]][key[1]]
+
+            def tail_call(frame):
+                args = [arg_expr(frame) for arg_expr in arg_exprs]
+                fire_hook("scope_enter", func_node)
+                return TailCall(func, args)
+
+        else:
+
+            def tail_call(frame):
+                return TailCall(func, [arg_expr(frame) for arg_expr in arg_exprs])
+
+        if self.hooks["call"]:
+            return self.__with_hook("call", (call_node,), tail_call)
+        return tail_call
+
+    # Expressions
+
+    def __compile_expr(self, expr_node):
+        compiler = self.expr_compilers.get(expr_node.elem_type)
+        if compiler is None:
+            return lambda frame: None
+        return compiler(expr_node)
+
+    def __compile_const(self, const_node):
+        # Values are never mutated, so one Value per literal node can be shared
+        # by every evaluation of that node
+        value = LITERAL_VALUES[const_node.elem_type](const_node.get("val"))
+        return lambda frame: value
+
+    def __compile_var(self, var_node):
+        var_name = var_node.get("name")
+        slot = self.resolver.resolve(var_name)
+        if slot is not None:
+            return lambda frame: frame[slot]
+
+        get_dynamic = self.frames.get_dynamic
+        error = self.interpreter.error
+
+        def eval_dynamic_var(frame):
+            val = get_dynamic(var_name)
+            if val is None:
+                error(ErrorType.NAME_ERROR, f"Variable {var_name} not found")
+            return val
+
+        return eval_dynamic_var
+
+    def __compile_call(self, call_node):
+        call = self.__compile_unhooked_call(call_node)
+        if self.hooks["call"]:
+            return self.__with_hook("call", (call_node,), call)
+        return call
+
+    def __compile_unhooked_call(self, call_node):
+        func_name = call_node.get("name")
+        if func_name == "print":
+            return self.__compile_print(call_node)
+        if func_name in ["inputi", "inputs"]:
+            return self.__compile_input(call_node)
+        error = self.interpreter.error
+        key = (func_name, len(call_node.get("args")))
+        if key not in self.compiled_funcs:
+            # calls to unknown functions are only an error if they are executed
+            def call_unknown(frame):
+                error(ErrorType.NAME_ERROR, f"Function {func_name} not found")
+
+            return call_unknown
+
+        arg_exprs = tuple(self.__compile_expr(arg) for arg in call_node.get("args"))
+        invoke = self.compiled_funcs[key].invoke
+        if self.hooks["scope_enter"]:
+            fire_hook = self.interpreter.fire_hook
+            func_node = self.func_table[func_name][key[1]]
+
+            def call_func(frame):
+                args = [arg_expr(frame) for arg_expr in arg_exprs]
+                fire_hook("scope_enter", func_node)
+                return invoke(args)
+
+            return call_func
+
+        def call_func(frame):
+            return invoke([arg_expr(frame) for arg_expr in arg_exprs])
+
+        return call_func
+
+    def __compile_print(self, call_node):
+        arg_exprs = tuple(self.__compile_expr(arg) for arg in call_node.get("args"))
+        output = self.interpreter.output
+
+        def call_print(frame):
+            output("".join([get_printable(arg_expr(frame)) for arg_expr in arg_exprs]))
+            return NIL_VALUE
+
+        return call_print
+
+    def __compile_input(self, call_node):
+        func_name = call_node.get("name")
+        args = call_node.get("args")
+        interpreter = self.interpreter
+        prompt = None
+        if len(args) == 1:
+            prompt = self.__compile_expr(args[0])
+        too_many_args = len(args) > 1
+
+        def call_input(frame):
+            if prompt is not None:
+                interpreter.output(get_printable(prompt(frame)))
+            elif too_many_args:
+                interpreter.error(
+                    ErrorType.NAME_ERROR, "No inputi() function that takes > 1 parameter"
+                )
+            inp = interpreter.get_input()
+            if func_name == "inputi":
+                return int_value(int(inp))
+            return Value(Type.STRING, inp)
+
+        return call_input
+
+    def __compile_binary_op(self, op_node):
+        op = op_node.elem_type
+        left = self.__compile_expr(op_node.get("op1"))
+        right = self.__compile_expr(op_node.get("op2"))
+        op_to_lambda = self.interpreter.op_to_lambda
+        fused_ops = self.interpreter.fused_ops
+        error = self.interpreter.error
+        # result of == and != on values of different types
+        mixed_type_result = None
+        if op == "==":
+            mixed_type_result = FALSE_VALUE
+        elif op == "!=":
+            mixed_type_result = TRUE_VALUE
+        # inline cache: the operand type this node saw last and its fused handler
+        cached_type = None
+        fused = None
+
+        def eval_binary_op(frame):
+            nonlocal cached_type, fused
+            left_value_obj = left(frame)
+            right_value_obj = right(frame)
+            if left_value_obj.t == cached_type and right_value_obj.t == cached_type:
+                return fused(left_value_obj.v, right_value_obj.v)
+            if left_value_obj.type() != right_value_obj.type():
+                if mixed_type_result is not None:
+                    return mixed_type_result
+                error(ErrorType.TYPE_ERROR, f"Incompatible types for {op} operation")
+            f = op_to_lambda[left_value_obj.type()].get(op)
+            if f is None:
+                error(
+                    ErrorType.TYPE_ERROR,
+                    f"Incompatible operator {op} for type {left_value_obj.type()}",
+                )
+            if op in fused_ops[left_value_obj.type()]:
+                cached_type = left_value_obj.type()
+                fused = fused_ops[cached_type][op]
+            return f(left_value_obj, right_value_obj)
+
+        return eval_binary_op
+
+    def __compile_unary_op(self, op_node):
+        op = op_node.elem_type
+        operand = self.__compile_expr(op_node.get("op1"))
+        operand_type = Type.INT if op == InterpreterBase.NEG_NODE else Type.BOOL
+        op_to_lambda = self.interpreter.op_to_lambda
+        error = self.interpreter.error
+
+        def eval_unary_op(frame):
+            op1_obj = operand(frame)
+            if op1_obj.type() != operand_type:
+                error(ErrorType.TYPE_ERROR, f"Wrong type for operation {op}")
+            return op_to_lambda[operand_type][op](op1_obj)
+
+        return eval_unary_op
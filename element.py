@@ -1,29 +1,293 @@
+from intbase import InterpreterBase
+
+
+# AST nodes. Every node type has its own Element subclass that stores its fields in
+# __slots__, so a node costs one small fixed-size object instead of an instance
+# __dict__ plus a separate dict of fields. Element(elem_type, **fields) still works
+# for every node type and returns an instance of the right subclass; node types
+# without a subclass fall back to a dict-backed Element.
 class Element:
+    __slots__ = ("elem_type",)
+    # fields of the node type, in the order the parser passes them
+    field_names = ()
+
+    def __new__(cls, elem_type=None, *args, **kwargs):
+        if cls is Element:
+            cls = NODE_CLASSES.get(elem_type, DictElement)
+        return object.__new__(cls)
+
+    # the value of field key, or None if the node type has no such field
+    def get(self, key):
+        if key in self.field_names:
+            return getattr(self, key)
+        return None
+
+    # the fields of this node, as a new dict
+    @property
+    def dict(self):
+        return {key: getattr(self, key) for key in self.field_names}
+
+    def __str__(self):
+        return "".join(self.iter_text())
+
+    # Write the str() of this node to a text file without building the whole string
+    def write_to(self, file):
+        file.writelines(self.iter_text())
+
+    # Yields the str() of this node in pieces: "type: field: value, ...", where a node
+    # field is shown as [node], a list field as [item, item, ...] and anything else
+    # with str(). Nodes are expanded from an explicit stack, so trees of any depth
+    # can be printed.
+    def iter_text(self):
+        # strings still to be yielded and nodes still to be expanded, last one first
+        pending = [self]
+        while pending:
+            item = pending.pop()
+            if type(item) is str:
+                yield item
+                continue
+            yield item.elem_type
+            parts = []
+            separator = ": "
+            for key, value in item.dict.items():
+                parts.append(separator + key + ": ")
+                separator = ", "
+                if isinstance(value, Element):
+                    parts += ("[", value, "]")
+                elif isinstance(value, list):
+                    parts.append("[")
+                    for i, list_item in enumerate(value):
+                        if i > 0:
+                            parts.append(", ")
+                        if not isinstance(list_item, Element):
+                            list_item = str(list_item)
+                        parts.append(list_item)
+                    parts.append("]")
+                else:
+                    parts.append(str(value))
+            parts.reverse()
+            pending += parts
+
+
+# Element for node types that have no slotted subclass
+class DictElement(Element):
+    __slots__ = ("fields",)
+
     def __init__(self, elem_type, **kwargs):
         self.elem_type = elem_type
-        self.dict = {}
-        for key, value in kwargs.items():
-            self.dict[key] = value
+        self.fields = kwargs
 
     def get(self, key):
-        if key not in self.dict:
-            return None
-        return self.dict[key]
+        return self.fields.get(key)
 
-    def __str__(self):
-        s = f"{self.elem_type}: "
-        for key, value in self.dict.items():
-            s += key + ": " + self.__val(value) + ", "
-        return s[0:-2]
-
-    def __val(self, v):
-        if isinstance(v, Element):
-            return "[" + str(v) + "]"
-        if isinstance(v, list):
-            s = ""
-            for i in v:
-                s += str(i) + ", "
-            if len(s) > 0:
-                return "[" + s[0:-2] + "]"
-            return "[" + s + "]"
-        return str(v)
+    @property
+    def dict(self):
+        return dict(self.fields)
+
+
+class ProgramElement(Element):
+    __slots__ = field_names = ("structs", "functions")
+
+    def __init__(self, elem_type, structs=None, functions=None):
+        self.elem_type = elem_type
+        self.structs = structs
+        self.functions = functions
+
+
+class StructElement(Element):
+    __slots__ = field_names = ("name", "fields")
+
+    def __init__(self, elem_type, name=None, fields=None):
+        self.elem_type = elem_type
+        self.name = name
+        self.fields = fields
+
+
+class FieldDefElement(Element):
+    __slots__ = field_names = ("name", "var_type")
+
+    def __init__(self, elem_type, name=None, var_type=None):
+        self.elem_type = elem_type
+        self.name = name
+        self.var_type = var_type
+
+
+class FuncElement(Element):
+    __slots__ = field_names = ("name", "args", "return_type", "statements")
+
+    def __init__(self, elem_type, name=None, args=None, return_type=None, statements=None):
+        self.elem_type = elem_type
+        self.name = name
+        self.args = args
+        self.return_type = return_type
+        self.statements = statements
+
+
+class ArgElement(Element):
+    __slots__ = field_names = ("name", "var_type")
+
+    def __init__(self, elem_type, name=None, var_type=None):
+        self.elem_type = elem_type
+        self.name = name
+        self.var_type = var_type
+
+
+class AssignElement(Element):
+    __slots__ = field_names = ("name", "expression")
+
+    def __init__(self, elem_type, name=None, expression=None):
+        self.elem_type = elem_type
+        self.name = name
+        self.expression = expression
+
+
+class VarDefElement(Element):
+    __slots__ = field_names = ("name", "var_type")
+
+    def __init__(self, elem_type, name=None, var_type=None):
+        self.elem_type = elem_type
+        self.name = name
+        self.var_type = var_type
+
+
+class IfElement(Element):
+    __slots__ = field_names = ("condition", "statements", "else_statements")
+
+    def __init__(self, elem_type, condition=None, statements=None, else_statements=None):
+        self.elem_type = elem_type
+        self.condition = condition
+        self.statements = statements
+        self.else_statements = else_statements
+
+
+class TryElement(Element):
+    __slots__ = field_names = ("statements", "catchers")
+
+    def __init__(self, elem_type, statements=None, catchers=None):
+        self.elem_type = elem_type
+        self.statements = statements
+        self.catchers = catchers
+
+
+class CatchElement(Element):
+    __slots__ = field_names = ("exception_type", "statements")
+
+    def __init__(self, elem_type, exception_type=None, statements=None):
+        self.elem_type = elem_type
+        self.exception_type = exception_type
+        self.statements = statements
+
+
+class ForElement(Element):
+    __slots__ = field_names = ("init", "condition", "update", "statements")
+
+    def __init__(self, elem_type, init=None, condition=None, update=None, statements=None):
+        self.elem_type = elem_type
+        self.init = init
+        self.condition = condition
+        self.update = update
+        self.statements = statements
+
+
+class RaiseElement(Element):
+    __slots__ = field_names = ("exception_type",)
+
+    def __init__(self, elem_type, exception_type=None):
+        self.elem_type = elem_type
+        self.exception_type = exception_type
+
+
+class ReturnElement(Element):
+    __slots__ = field_names = ("expression",)
+
+    def __init__(self, elem_type, expression=None):
+        self.elem_type = elem_type
+        self.expression = expression
+
+
+class UnaryOpElement(Element):
+    __slots__ = field_names = ("op1",)
+
+    def __init__(self, elem_type, op1=None):
+        self.elem_type = elem_type
+        self.op1 = op1
+
+
+class BinaryOpElement(Element):
+    __slots__ = field_names = ("op1", "op2")
+
+    def __init__(self, elem_type, op1=None, op2=None):
+        self.elem_type = elem_type
+        self.op1 = op1
+        self.op2 = op2
+
+
+class NewElement(Element):
+    __slots__ = field_names = ("var_type",)
+
+    def __init__(self, elem_type, var_type=None):
+        self.elem_type = elem_type
+        self.var_type = var_type
+
+
+class ValueElement(Element):
+    __slots__ = field_names = ("val",)
+
+    def __init__(self, elem_type, val=None):
+        self.elem_type = elem_type
+        self.val = val
+
+
+class NilElement(Element):
+    __slots__ = field_names = ()
+
+    def __init__(self, elem_type):
+        self.elem_type = elem_type
+
+
+class VarElement(Element):
+    __slots__ = field_names = ("name",)
+
+    def __init__(self, elem_type, name=None):
+        self.elem_type = elem_type
+        self.name = name
+
+
+class FcallElement(Element):
+    __slots__ = field_names = ("name", "args")
+
+    def __init__(self, elem_type, name=None, args=None):
+        self.elem_type = elem_type
+        self.name = name
+        self.args = args
+
+
+# elem_type -> node class. Binary operators are used as the elem_type of their nodes.
+NODE_CLASSES = {
+    InterpreterBase.PROGRAM_NODE: ProgramElement,
+    InterpreterBase.STRUCT_NODE: StructElement,
+    InterpreterBase.FIELD_DEF_NODE: FieldDefElement,
+    InterpreterBase.FUNC_NODE: FuncElement,
+    InterpreterBase.ARG_NODE: ArgElement,
+    "=": AssignElement,
+    InterpreterBase.VAR_DEF_NODE: VarDefElement,
+    InterpreterBase.IF_NODE: IfElement,
+    InterpreterBase.TRY_NODE: TryElement,
+    InterpreterBase.CATCH_NODE: CatchElement,
+    InterpreterBase.FOR_NODE: ForElement,
+    InterpreterBase.RAISE_NODE: RaiseElement,
+    InterpreterBase.RETURN_NODE: ReturnElement,
+    InterpreterBase.NOT_NODE: UnaryOpElement,
+    InterpreterBase.NEG_NODE: UnaryOpElement,
+    InterpreterBase.NEW_NODE: NewElement,
+    InterpreterBase.INT_NODE: ValueElement,
+    InterpreterBase.BOOL_NODE: ValueElement,
+    InterpreterBase.STRING_NODE: ValueElement,
+    InterpreterBase.NIL_NODE: NilElement,
+    InterpreterBase.VAR_NODE: VarElement,
+    InterpreterBase.FCALL_NODE: FcallElement,
+}
+NODE_CLASSES.update(
+    (op, BinaryOpElement)
+    for op in ("+", "-", "*", "/", "==", "!=", "<", "<=", ">", ">=", "&&", "||")
+)
@@ -2,7 +2,7 @@
 # in a brewin program and the value of that variable - the value that's passed in can be
 # anything you like. In our implementation we pass in a Value object which holds a type
 # and a value (e.g., Int, 10).
-from type_valuev1 import Type, Value
+from type_valuev1 import NIL_VALUE
 class EnvironmentManager:
     def __init__(self):
         # Environment is now a stack of dictionaries
@@ -14,7 +14,7 @@ class EnvironmentManager:
         for scope in reversed(self.environment):
             if symbol in scope:
                 if(scope[symbol] == None):
-                    return Value(Type.NIL, None)
+                    return NIL_VALUE
                 return scope[symbol]
         return None
 
@@ -22,11 +22,7 @@ class EnvironmentManager:
     def set(self, symbol, value):
         for scope in reversed(self.environment):
             if symbol in scope:
-                # if self.environment.index(scope) != (len(self.environment) - 1):
-                #     self.create(symbol, value)
-                # else:
-                #     self.environment[-1][symbol] = value
-                self.environment[self.environment.index(scope)][symbol] = value
+                scope[symbol] = value
                 return True
         return False
         
@@ -39,11 +35,69 @@ class EnvironmentManager:
         return False
     
     def enter_scope(self):
-        print(self.environment)
         self.environment.append({})
 
     def exit_scope(self):
         # print(self.environment)
         self.environment.pop()
     def current_scope(self):
-        print (self.environment[-1])
\ No newline at end of file
+        print (self.environment[-1])
+
+
+# Marks a frame slot whose variable is not in scope (not declared yet, or its
+# block has been exited)
+UNBOUND = object()
+
+
+# The FrameManager is the environment used by the compiled backends. Each function
+# call gets one frame: a flat list with a slot for every variable of the function,
+# as assigned by resolver_v2.FunctionResolver, so a variable access is a single list
+# index. Names a function uses without declaring them are looked up by name in the
+# frames of its callers, innermost first, which keeps the dynamic scoping of the
+# EnvironmentManager's single scope stack.
+class FrameManager:
+    def __init__(self):
+        # frame of each active call, innermost last
+        self.frames = []
+        # for each frame, the name -> slots table of its function
+        self.frame_slots = []
+
+    def push(self, num_slots, slots_by_name):
+        frame = [UNBOUND] * num_slots
+        self.frames.append(frame)
+        self.frame_slots.append(slots_by_name)
+        return frame
+
+    def pop(self):
+        self.frames.pop()
+        self.frame_slots.pop()
+
+    # Gets the value of a variable the current function doesn't declare
+    def get_dynamic(self, symbol):
+        for i in range(len(self.frames) - 2, -1, -1):
+            frame = self.frames[i]
+            for slot in self.frame_slots[i].get(symbol, ()):
+                if frame[slot] is not UNBOUND:
+                    return frame[slot]
+        return None
+
+    # Sets a variable the current function doesn't declare
+    def set_dynamic(self, symbol, value):
+        for i in range(len(self.frames) - 2, -1, -1):
+            frame = self.frames[i]
+            for slot in self.frame_slots[i].get(symbol, ()):
+                if frame[slot] is not UNBOUND:
+                    frame[slot] = value
+                    return True
+        return False
+
+
+# What a `return f(...)` run as a tail call returns instead of a Value: the returning
+# function's frame is dropped, and its caller runs func on args in its place, so
+# tail recursion takes constant stack (see resolver_v2.find_tail_callable)
+class TailCall:
+    __slots__ = ("func", "args")
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
@@ -0,0 +1,64 @@
+# An InputSource feeds inputi()/inputs() from a file or an iterator one line at a
+# time, so a program can read an input of any size in constant memory.
+# File objects (anything with a read() method: text or binary files, io streams,
+# mmap.mmap) are read in blocks of chunk_size and split into lines; bytes are decoded
+# as UTF-8 and \r\n and \r line endings become \n. Any other iterable is taken to
+# yield one line per item. Lines are returned without their trailing \n or \r\n, like
+# input().
+# InterpreterBase wraps any inp that isn't a list or tuple in an InputSource.
+import codecs
+import io
+from collections import deque
+
+
+class InputSource:
+    def __init__(self, source, chunk_size=64 * 1024):
+        self.chunk_size = chunk_size
+        # lines read ahead of the program
+        self.lines = deque()
+        # start of a line whose end hasn't been read yet
+        self.partial = ""
+        self.read = getattr(source, "read", None)
+        self.items = None if self.read is not None else iter(source)
+        self.decoder = None
+        self.exhausted = False
+
+    # Returns the next line, or None at the end of the input
+    def next_line(self):
+        if self.items is not None:
+            line = next(self.items, None)
+            if line is None:
+                return None
+            if isinstance(line, bytes):
+                line = line.decode()
+            if line.endswith("\r\n"):
+                return line[:-2]
+            if line.endswith("\n"):
+                return line[:-1]
+            return line
+        lines = self.lines
+        while not lines:
+            if self.exhausted:
+                return None
+            self.__read_chunk()
+        return lines.popleft()
+
+    def __read_chunk(self):
+        chunk = self.read(self.chunk_size)
+        at_end = not chunk
+        if self.decoder is None:
+            # a \r\n split between two chunks still becomes one \n
+            bytes_decoder = None
+            if isinstance(chunk, bytes):
+                bytes_decoder = codecs.getincrementaldecoder("utf-8")()
+            self.decoder = io.IncrementalNewlineDecoder(bytes_decoder, translate=True)
+        chunk = self.decoder.decode(chunk, final=at_end)
+        split = (self.partial + chunk).split("\n")
+        self.partial = split.pop()
+        self.lines.extend(split)
+        if at_end:
+            self.exhausted = True
+            # the last line has no newline
+            if self.partial:
+                self.lines.append(self.partial)
+                self.partial = ""
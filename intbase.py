@@ -1,6 +1,8 @@
 # Base class for our interpreter
 from enum import Enum
 
+from input_source import InputSource
+
 
 class ErrorType(Enum):
     TYPE_ERROR = 1
@@ -40,14 +42,25 @@ class InterpreterBase:
     VOID_DEF = "void"
     
     # methods
-    def __init__(self, console_output=True, inp=None):
+    # inp: None to read input from the keyboard, a list of input lines, or a file or
+    #   iterator to read lines from as they are needed (see input_source.py)
+    # output_sink: an output_sink.OutputSink to write console output through in
+    # blocks, or None to print() every line
+    def __init__(self, console_output=True, inp=None, output_sink=None):
         self.console_output = console_output
         self.inp = inp  # if not none, then read input from passed-in list
+        self.input_source = None
+        if inp is not None and not isinstance(inp, (list, tuple)):
+            self.input_source = InputSource(inp)
+        self.output_sink = output_sink
         self.reset()
 
     # Call to reset I/O for another run of the program
     def reset(self):
-        self.output_log = []
+        if self.output_sink is None:
+            self.output_log = []
+        else:
+            self.output_log = self.output_sink.new_log()
         self.input_cursor = 0
         self.error_type = None
         self.error_line = None
@@ -57,6 +70,8 @@ class InterpreterBase:
         pass
 
     def get_input(self):
+        if self.input_source is not None:
+            return self.input_source.next_line()
         if not self.inp:
             return input()  # Get input from keyboard if not input list provided
 
@@ -82,11 +97,15 @@ class InterpreterBase:
 
     def output(self, v):
         if self.console_output:
-            print(v)
+            if self.output_sink is None:
+                print(v)
+            else:
+                self.output_sink.write(v)
         self.output_log.append(v)
 
+    # a list even when the output sink keeps output_log as a deque
     def get_output(self):
-        return self.output_log
+        return list(self.output_log)
 
     def get_error_type_and_line(self):
         return self.error_type, self.error_line
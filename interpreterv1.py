@@ -62,10 +62,8 @@ class Interpreter(InterpreterBase):
         super().error(ErrorType.NAME_ERROR, f"Function {func_name} not found")
 
     def __call_print(self, call_ast):
-        output = ""
-        for arg in call_ast.get("args"):
-            result = self.__eval_expr(arg)  # result is a Value object
-            output = output + get_printable(result)
+        # result of each argument is a Value object
+        output = "".join([get_printable(self.__eval_expr(arg)) for arg in call_ast.get("args")])
         super().output(output)
 
     def __call_input(self, call_ast):
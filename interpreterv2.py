@@ -1,10 +1,26 @@
 # Add to spec:
 # - printing out a nil value is undefined
 
-from env_v1 import EnvironmentManager
-from type_valuev1 import Type, Value, create_value, get_printable
+from env_v1 import EnvironmentManager, FrameManager, TailCall
+from type_valuev1 import (
+    Type,
+    Value,
+    NIL_VALUE,
+    TRUE_VALUE,
+    FALSE_VALUE,
+    bool_value,
+    concat_strings,
+    create_value,
+    get_printable,
+    int_value,
+)
 from intbase import InterpreterBase, ErrorType
 from brewparse import parse_program
+from resolver_v2 import find_pure, find_reachable, find_tail_callable, scan_functions
+from closure_v2 import ClosureCompiler
+from bytecode_v2 import BytecodeCompiler, VirtualMachine
+from optimizer_v2 import ConstantFolder
+from transpiler_v2 import PythonTranspiler
 
 
 # Main interpreter class
@@ -20,24 +36,156 @@ class Interpreter(InterpreterBase):
     # Parser already takes care of it, no special handling nedded.
     LOG_OPS = {"||", "&&", "!", "==", "!="}
     STR_OPS = {"+"}
+    UNARY_OPS = {InterpreterBase.NEG_NODE, InterpreterBase.NOT_NODE}
+    # calls to these names never reach a user-defined function
+    BUILTIN_FUNCS = {"print", "inputi", "inputs"}
+    BINARY_OPS = (ARITH_OPS | COMP_OPS | LOG_OPS | STR_OPS) - UNARY_OPS
+    # "tree" walks the Element AST directly; "closure" first compiles every function
+    # into pre-bound Python closures (see closure_v2.py) and runs those instead;
+    # "bytecode" compiles to instruction arrays run by a stack VM (see bytecode_v2.py),
+    # which keeps Brewin calls on its own stack, so only it supports deep recursion;
+    # "python" generates Python source for every function and runs it compiled (see
+    # transpiler_v2.py), or uses closures for programs it can't transpile
+    EXEC_MODES = {"tree", "closure", "bytecode", "python"}
+    # leaves room for recursion a million calls deep, like f(1000000) down to f(0)
+    DEFAULT_MAX_CALL_DEPTH = 2_000_000
+    # Trace hooks, see add_hook(). Arguments each hook is called with:
+    # "statement": the statement Element about to run
+    # "scope_enter": the func/if/for Element whose block scope is being entered
+    # "assign": the variable name and the Value about to be assigned to it
+    # "call": the fcall Element about to be evaluated
+    HOOK_EVENTS = ("statement", "scope_enter", "assign", "call")
     # now have constants = {true, false, nil} (TO-DO) checked but not sure completely
     # methods
-    def __init__(self, console_output=True, inp=None, trace_output=False):
-        super().__init__(console_output, inp)
+    # ast_cache: an ast_cache.ASTCache to reuse the parsed ASTs of programs that were
+    # run before, or None to parse every program
+    # max_call_depth: how deeply Brewin function calls can nest inside main (a call
+    #   made by main is at depth 1) before a FAULT_ERROR is raised, or None for
+    #   DEFAULT_MAX_CALL_DEPTH. Only the bytecode mode counts calls; the other modes
+    #   recurse in Python and raise it at Python's recursion limit, so they reject
+    #   the argument.
+    # output_sink: an output_sink.OutputSink that buffers console output and decides
+    #   how much of it output_log keeps, or None to print every line and keep all
+    # memo_cache: a memo_cache.MemoCache to remember the return values of pure
+    #   functions, or None to run every call
+    # optimize: fold constant expressions and drop dead branches before running (see
+    #   optimizer_v2.py); the number of nodes removed is left in nodes_eliminated
+    def __init__(
+        self,
+        console_output=True,
+        inp=None,
+        trace_output=False,
+        exec_mode="tree",
+        ast_cache=None,
+        max_call_depth=None,
+        memo_cache=None,
+        optimize=False,
+        output_sink=None,
+    ):
+        super().__init__(console_output, inp, output_sink)
+        if exec_mode not in self.EXEC_MODES:
+            raise ValueError(f"Unknown execution mode {exec_mode}")
         self.trace_output = trace_output
+        self.exec_mode = exec_mode
+        self.ast_cache = ast_cache
+        if max_call_depth is None:
+            max_call_depth = self.DEFAULT_MAX_CALL_DEPTH
+        elif exec_mode != "bytecode":
+            raise ValueError("max_call_depth is only supported in bytecode mode")
+        self.max_call_depth = max_call_depth
+        self.memo_cache = memo_cache
+        self.optimize = optimize
+        self.nodes_eliminated = 0
+        self.hooks = {event: [] for event in self.HOOK_EVENTS}
+        if trace_output:
+            self.add_hook("statement", print)
         self.__setup_ops()
+        self.__setup_dispatch()
         # self.is_return = False
 
     # run a program that's provided in a string
     # usese the provided Parser found in brewparse.py to parse the program
     # into an abstract syntax tree (ast)
     def run(self, program):
-        ast = parse_program(program)
+        try:
+            self.__run(program)
+        finally:
+            # write out what was printed, also when the program failed
+            if self.output_sink is not None:
+                self.output_sink.flush()
+
+    # Parsing, scanning and compiling recurse once per nesting level of the program, and
+    # the tree and closure modes once per Brewin call as well, so running out of Python
+    # stack anywhere is reported as a FAULT_ERROR
+    def __run(self, program):
+        try:
+            self.__run_program(program)
+        except RecursionError:
+            super().error(ErrorType.FAULT_ERROR, "Maximum nesting or call depth exceeded")
+
+    def __run_program(self, program):
+        ast = self.__parse(program)
         self.__set_up_function_table(ast)
         # print(self.func_name_to_ast)
         main_func = self.__get_func_by_name("main",0)
-        self.env = EnvironmentManager()
-        self.__run_statements(main_func.get("statements"))
+        if self.exec_mode == "bytecode":
+            self.frames = FrameManager()
+            self.bytecode = BytecodeCompiler(self).compile_program()
+            VirtualMachine(self).execute(self.bytecode[("main", 0)])
+            return
+        exec_mode = self.exec_mode
+        if exec_mode == "python":
+            main = PythonTranspiler(self).compile_program(program)
+            if main is None:
+                exec_mode = "closure"
+        if exec_mode == "closure":
+            self.frames = FrameManager()
+            main = ClosureCompiler(self).compile_program()
+        elif exec_mode == "tree":
+            self.env = EnvironmentManager()
+            self.op_caches = {}
+        if exec_mode == "python":
+            main()
+        elif exec_mode == "closure":
+            main.invoke([])
+        else:
+            result = self.__run_statements(main_func.get("statements"))
+            if type(result) is TailCall:
+                self.__run_calls(result.func, result.args)
+
+    # Register a callable to be run on a trace event (see HOOK_EVENTS). Hooks should be
+    # registered before run(); the compiled backends only emit hook calls for events
+    # that have hooks at compile time, so unused events cost nothing.
+    def add_hook(self, event, hook):
+        if event not in self.hooks:
+            raise ValueError(f"Unknown hook event {event}")
+        self.hooks[event].append(hook)
+
+    def remove_hook(self, event, hook):
+        self.hooks[event].remove(hook)
+
+    def fire_hook(self, event, *args):
+        for hook in self.hooks[event]:
+            hook(*args)
+
+    # Parse a program and compile it to bytecode without running it. Returns a dict
+    # from (function name, num_args) to FunctionCode; pass those to
+    # bytecode_v2.disassemble() to inspect the generated code.
+    def compile_bytecode(self, program):
+        ast = self.__parse(program)
+        self.__set_up_function_table(ast)
+        return BytecodeCompiler(self).compile_program()
+
+    def __parse(self, program):
+        if self.ast_cache is not None:
+            ast = self.ast_cache.parse(program)
+        else:
+            ast = parse_program(program)
+        if self.optimize:
+            folder = ConstantFolder(self)
+            ast = folder.fold_program(ast)
+            self.nodes_eliminated = folder.nodes_eliminated
+        return ast
 
     def __set_up_function_table(self, ast):
         self.func_name_to_ast = {}
@@ -51,7 +199,23 @@ class Interpreter(InterpreterBase):
             if (function_name not in self.func_name_to_ast):
                 self.func_name_to_ast[function_name] = {}
             self.func_name_to_ast[function_name][num_args] = func_def
-        
+        scanners = scan_functions(self.func_name_to_ast)
+        # ids of the statement lists the tree walker runs in a scope of their own
+        self.scoped_blocks = set()
+        for scanner in scanners.values():
+            self.scoped_blocks |= scanner.scoped_blocks
+        # (name, num_args) of the functions that `return f(...)` runs as a tail call
+        self.tail_callable = {
+            key for key in find_tail_callable(scanners) if key[0] not in self.BUILTIN_FUNCS
+        }
+        # (name, num_args) of a function -> the functions calling it can lead to, for
+        # the tail-callable ones
+        self.tail_call_reach = {key: find_reachable(scanners, key) for key in self.tail_callable}
+        # FUNC_NODEs of the functions whose calls go through the memo cache
+        self.memoized_funcs = set()
+        if self.memo_cache is not None:
+            for func_name, num_args in find_pure(scanners, self.BUILTIN_FUNCS):
+                self.memoized_funcs.add(self.func_name_to_ast[func_name][num_args])
 
     # Need to also provide num_args to access overloaded functions
     def __get_func_by_name(self, name, num_args):
@@ -66,33 +230,19 @@ class Interpreter(InterpreterBase):
     def __run_statements(self, statements):
         # all statements of a function are held in arg3 of the function AST node
         # returned_value = Value(Type.NIL, None)
+        statement_hooks = self.hooks["statement"]
+        statement_runners = self.statement_runners
         for statement in statements:
-            # print(statement)
-            if self.trace_output:
-                print(statement)
-            if statement.elem_type == InterpreterBase.FCALL_NODE:
-                self.__call_func(statement)
-            elif statement.elem_type == "=":
-                self.__assign(statement)
-            elif statement.elem_type == InterpreterBase.VAR_DEF_NODE:
-                self.__var_def(statement)
-            elif statement.elem_type == InterpreterBase.IF_NODE:
-                result = self.__if(statement)
-                # if block has return statement, terminate the function
-                if result is not None:
-                    # print(result.value())
-                    # self.is_return = False
-                    return result
-            elif statement.elem_type == InterpreterBase.FOR_NODE:
-                result = self.__for(statement)
-                if result is not None:
-                    return result
-            elif statement.elem_type == InterpreterBase.RETURN_NODE:
-                # print(statement.get("expression"))
-                # print(self.__return(statement).value())
-                # self.is_return = True
-                return self.__return(statement)
-        # return returned_value
+            if statement_hooks:
+                self.fire_hook("statement", statement)
+            runner = statement_runners.get(statement.elem_type)
+            # any other kind of statement is skipped
+            if runner is None:
+                continue
+            result = runner(statement)
+            # a return statement, or one nested in an if or for block, ends the function
+            if result is not None:
+                return result
     # Support recursion via function calls (checked)not entirely sure, could have some potential bugs
     # Support overloaded functions if they take different numbers of parameters(checked)
     # functions can return a value : return a default value of nil if functions
@@ -102,7 +252,13 @@ class Interpreter(InterpreterBase):
     # raise ErrorType.NAME_ERROR if calling functions with wrong number of arguments(checked)
     # Don't need to consider the case that defining 2 functions with same names and parameters 
     # Defining functions with name print, inputi, inputs will not be tested 
+    def __call_statement(self, call_node):
+        # the returned value of a call used as a statement is discarded
+        self.__call_func(call_node)
+
     def __call_func(self, call_node):
+        if self.hooks["call"]:
+            self.fire_hook("call", call_node)
         func_name = call_node.get("name")
         if func_name == "print":
             return self.__call_print(call_node)
@@ -122,25 +278,53 @@ class Interpreter(InterpreterBase):
             super().error(ErrorType.NAME_ERROR, f"Function {func_name} not found {self.func_name_to_ast}")
 
     def __run_func(self, call_node, func_node):
-        self.env.enter_scope()
-        for arg, para in zip(call_node.get("args"), func_node.get("args")):
-            result = self.__eval_expr(arg)
-            self.env.create(para.get("name"), result)
-            # print(self.env.get(para.get("name")).value())
-        return_value = self.__run_statements(func_node.get("statements"))
-        # print("Return value after __run_function: ",return_value.value())
-        self.env.exit_scope()
-        # print("Return value after __run_function: ",return_value)
+        # arguments are evaluated in the caller's scope before the callee's is entered
+        args = [self.__eval_expr(arg) for arg in call_node.get("args")]
+        if func_node in self.memoized_funcs:
+            key = self.memo_cache.key(func_node, args)
+            return_value = self.memo_cache.get(key)
+            if return_value is None:
+                return_value = self.__run_calls(func_node, args)
+                self.memo_cache.put(key, return_value)
+            return return_value
+        return self.__run_calls(func_node, args)
+
+    # Run a function on already evaluated arguments, then in turn every function it
+    # tail calls (see __return), so tail recursion doesn't nest Python calls
+    def __run_calls(self, func_node, args):
+        while True:
+            statements = func_node.get("statements")
+            scoped = self.__enter_scope(func_node, statements)
+            for result, para in zip(args, func_node.get("args")):
+                self.env.create(para.get("name"), result)
+            return_value = self.__run_statements(statements)
+            if scoped:
+                self.env.exit_scope()
+            if type(return_value) is not TailCall:
+                break
+            func_node = return_value.func
+            args = return_value.args
+        # functions without a return statement return nil
+        if return_value is None:
+            return NIL_VALUE
         return return_value
     
+    # Enter the block of a func/if/for node. Only blocks that declare variables (see
+    # resolver_v2.FunctionScanner) get a scope of their own; returns whether the
+    # block did, in which case the caller exits the scope after the block.
+    def __enter_scope(self, node, statements):
+        if self.hooks["scope_enter"]:
+            self.fire_hook("scope_enter", node)
+        if id(statements) in self.scoped_blocks:
+            self.env.enter_scope()
+            return True
+        return False
+
     def __call_print(self, call_ast):
-        print(call_ast)
-        output = ""
-        for arg in call_ast.get("args"):
-            result = self.__eval_expr(arg)  # result is a Value object
-            output = output + get_printable(result)
+        # result of each argument is a Value object
+        output = "".join([get_printable(self.__eval_expr(arg)) for arg in call_ast.get("args")])
         super().output(output)
-        return Value(Type.NIL, None) # checked, print() always returns value of nil
+        return NIL_VALUE # checked, print() always returns value of nil
 
     def __call_input(self, call_ast):
         args = call_ast.get("args")
@@ -153,7 +337,7 @@ class Interpreter(InterpreterBase):
             )
         inp = super().get_input()
         if call_ast.get("name") == "inputi":
-            return Value(Type.INT, int(inp))
+            return int_value(int(inp))
         # we can support inputs here later
         if call_ast.get("name") == "inputs":
             return Value(Type.STRING, inp)
@@ -161,7 +345,8 @@ class Interpreter(InterpreterBase):
     def __assign(self, assign_ast):
         var_name = assign_ast.get("name")
         value_obj = self.__eval_expr(assign_ast.get("expression"))
-        print(value_obj.value())
+        if self.hooks["assign"]:
+            self.fire_hook("assign", var_name, value_obj)
         if not self.env.set(var_name, value_obj):
             super().error(
                 ErrorType.NAME_ERROR, f"Undefined variable {var_name} in assignment"
@@ -170,7 +355,7 @@ class Interpreter(InterpreterBase):
         # print(self.env.current_scope())
     def __var_def(self, var_ast):
         var_name = var_ast.get("name")
-        if not self.env.create(var_name, Value(Type.INT, 0)):
+        if not self.env.create(var_name, int_value(0)):
             super().error(
                 ErrorType.NAME_ERROR, f"Duplicate definition for variable {var_name}"
             )
@@ -193,9 +378,11 @@ class Interpreter(InterpreterBase):
         returned_value = None
         if condition_result.value():
             # print(condition_result.value())
-            self.env.enter_scope()
-            returned_value = self.__run_statements(if_ast.get("statements"))
-            self.env.exit_scope()
+            statements = if_ast.get("statements")
+            scoped = self.__enter_scope(if_ast, statements)
+            returned_value = self.__run_statements(statements)
+            if scoped:
+                self.env.exit_scope()
             # print(returned_value)
         else:
             # print(condition_result.value())
@@ -203,9 +390,10 @@ class Interpreter(InterpreterBase):
             # print(else_clause_return)
             if else_clause_return != None:
                 # print("running statements in else block")
-                self.env.enter_scope()
+                scoped = self.__enter_scope(if_ast, else_clause_return)
                 returned_value = self.__run_statements(else_clause_return)
-                self.env.exit_scope()
+                if scoped:
+                    self.env.exit_scope()
         # self.env.exit_scope()
         # print(returned_value)
         return returned_value
@@ -219,7 +407,10 @@ class Interpreter(InterpreterBase):
     # "statements" maps to a list of statements, which only executed if condition is true
     # Program supports nested loops (TO-DO)checked but not entirely sure
     def __for(self, for_ast):
-        self.env.enter_scope()
+        # the scope around the whole loop would only ever be empty: init and update
+        # are assignments, and the body gets its own scope
+        if self.hooks["scope_enter"]:
+            self.fire_hook("scope_enter", for_ast)
         initialization = for_ast.get("init")
         if (initialization.elem_type == "="):
             self.__assign(initialization)
@@ -233,11 +424,11 @@ class Interpreter(InterpreterBase):
             statements = for_ast.get("statements")
             if condition.value():
                 # print(self.__run_statements(statements))
-                self.env.enter_scope()
+                scoped = self.__enter_scope(for_ast, statements)
                 result = self.__run_statements(statements)
-                self.env.exit_scope()
-                if result is not None:
+                if scoped:
                     self.env.exit_scope()
+                if result is not None:
                     return result
             else:
                 break
@@ -247,7 +438,6 @@ class Interpreter(InterpreterBase):
                 self.__assign(update)
             else:
                 super().error(ErrorType.TYPE_ERROR, "Update in loops must be an assignment")
-        self.env.exit_scope()
 
 
     # "expression" maps to returned object, which is an expression, a variable, a value or nothing.
@@ -259,82 +449,121 @@ class Interpreter(InterpreterBase):
     # 
     def __return(self, return_ast):
         expression = return_ast.get("expression")
-        # print(return_ast, expression)
-        # print(expression)
         if (expression is None):
-            # print("return none")
-            return Value(Type.NIL, None)
-        # print(isinstance(self.__eval_expr(expression), Value))
-        # if isinstance(self.__eval_expr(expression), Value):
-            # print(self.__eval_expr(expression).value())
+            return NIL_VALUE
+        # `return f(...)` evaluates the arguments here, then unwinds this function's
+        # scopes and lets __run_calls run f, unless f might look up variables of the
+        # scopes being dropped
+        if expression.elem_type == InterpreterBase.FCALL_NODE:
+            key = (expression.name, len(expression.args))
+            if key in self.tail_callable:
+                if self.hooks["call"]:
+                    self.fire_hook("call", expression)
+                args = [self.__eval_expr(arg) for arg in expression.args]
+                return TailCall(self.func_name_to_ast[key[0]][key[1]], args)
         return self.__eval_expr(expression)
 
 
     def __eval_expr(self, expr_ast):
-        # print(expr_ast)
-        if expr_ast.elem_type == InterpreterBase.INT_NODE:
-            # print("return an int here")
-            return Value(Type.INT, expr_ast.get("val"))
-        if expr_ast.elem_type == InterpreterBase.STRING_NODE:
-            return Value(Type.STRING, expr_ast.get("val"))
-        if expr_ast.elem_type == InterpreterBase.BOOL_NODE:
-            return Value(Type.BOOL, expr_ast.get("val"))
-        if expr_ast.elem_type == InterpreterBase.VAR_NODE:
-            var_name = expr_ast.get("name")
-            val = self.env.get(var_name)
-            if val is None:
-                # val = Value(Type.NIL, None)
-                super().error(ErrorType.NAME_ERROR, f"Variable {var_name} not found")
-            return val
-        # the returned value from the function will be used in the expression
-        # print() returns nil
-        # && and || muse use strict evaluation.(both arguments must be evaluated in all cases)
-        if expr_ast.elem_type == InterpreterBase.FCALL_NODE:
-            return self.__call_func(expr_ast)
-        if expr_ast.elem_type in (self.ARITH_OPS | self.COMP_OPS | self.LOG_OPS | self.STR_OPS):
-            return self.__eval_op(expr_ast)
-        if expr_ast.elem_type == InterpreterBase.NIL_NODE:
-            return Value(Type.NIL, None)
-        
-    def __eval_op(self, ops_ast):
-        if(ops_ast.elem_type not in ["neg", "!"]):
-            # print(ops_ast)
-            left_value_obj = self.__eval_expr(ops_ast.get("op1"))
-            right_value_obj = self.__eval_expr(ops_ast.get("op2"))
-            # print(left_value_obj, right_value_obj)
-            # print(left_value_obj, right_value_obj.value())
-            # Legal to compare different types (including None) with == and !=
-            # Illegal to compare diferent tyes with the rest of comparison operations(checked)
-            #  if happened, raise ErrorType.TYPE_ERROR(checked)
-            if left_value_obj.type() != right_value_obj.type():
-                if ops_ast.elem_type == "==":
-                    return Value(Type.BOOL, False)
-                elif ops_ast.elem_type == "!=":
-                    return Value(Type.BOOL, True)
-                else:
-                    super().error(
-                    ErrorType.TYPE_ERROR,
-                    f"Incompatible types for {ops_ast.elem_type} operation",)
-            if ops_ast.elem_type not in self.op_to_lambda[left_value_obj.type()]:
+        evaluator = self.expr_evaluators.get(expr_ast.elem_type)
+        # expressions of any other kind evaluate to None
+        if evaluator is None:
+            return None
+        return evaluator(expr_ast)
+
+    def __eval_int(self, int_ast):
+        return int_value(int_ast.val)
+
+    def __eval_string(self, string_ast):
+        return Value(Type.STRING, string_ast.val)
+
+    def __eval_bool(self, bool_ast):
+        return bool_value(bool_ast.val)
+
+    def __eval_nil(self, nil_ast):
+        return NIL_VALUE
+
+    def __eval_var(self, var_ast):
+        var_name = var_ast.name
+        val = self.env.get(var_name)
+        if val is None:
+            super().error(ErrorType.NAME_ERROR, f"Variable {var_name} not found")
+        return val
+
+    # && and || muse use strict evaluation.(both arguments must be evaluated in all cases)
+    def __eval_binary_op(self, ops_ast):
+        left_value_obj = self.__eval_expr(ops_ast.op1)
+        right_value_obj = self.__eval_expr(ops_ast.op2)
+        # inline cache: while both operands have the type this node saw last time, go
+        # straight to the fused handler for that type
+        cached = self.op_caches.get(ops_ast)
+        if cached is not None:
+            operand_type, fused = cached
+            if left_value_obj.t == operand_type and right_value_obj.t == operand_type:
+                return fused(left_value_obj.v, right_value_obj.v)
+        # Legal to compare different types (including None) with == and !=
+        # Illegal to compare diferent tyes with the rest of comparison operations(checked)
+        #  if happened, raise ErrorType.TYPE_ERROR(checked)
+        if left_value_obj.type() != right_value_obj.type():
+            if ops_ast.elem_type == "==":
+                return FALSE_VALUE
+            elif ops_ast.elem_type == "!=":
+                return TRUE_VALUE
+            else:
                 super().error(
-                    ErrorType.TYPE_ERROR,
-                    f"Incompatible operator {ops_ast.elem_type} for type {left_value_obj.type()}",
-                )
-            f = self.op_to_lambda[left_value_obj.type()][ops_ast.elem_type]
-            # print(left_value_obj.value(), right_value_obj.value())
-            return f(left_value_obj, right_value_obj)
+                ErrorType.TYPE_ERROR,
+                f"Incompatible types for {ops_ast.elem_type} operation",)
+        if ops_ast.elem_type not in self.op_to_lambda[left_value_obj.type()]:
+            super().error(
+                ErrorType.TYPE_ERROR,
+                f"Incompatible operator {ops_ast.elem_type} for type {left_value_obj.type()}",
+            )
+        f = self.op_to_lambda[left_value_obj.type()][ops_ast.elem_type]
+        fused = self.fused_ops[left_value_obj.type()].get(ops_ast.elem_type)
+        if fused is not None:
+            self.op_caches[ops_ast] = (left_value_obj.type(), fused)
+        return f(left_value_obj, right_value_obj)
+
+    def __eval_unary_op(self, ops_ast):
+        op1_obj = self.__eval_expr(ops_ast.op1)
+        if(op1_obj.type()== Type.INT and ops_ast.elem_type == "neg"):
+            f = self.op_to_lambda[op1_obj.type()][ops_ast.elem_type]
+            return f(op1_obj)
+        elif(op1_obj.type() == Type.BOOL and ops_ast.elem_type == "!"):
+            f = self.op_to_lambda[op1_obj.type()][ops_ast.elem_type]
+            return f(op1_obj)
         else:
-            op1_obj = self.__eval_expr(ops_ast.get("op1"))
-            if(op1_obj.type()== Type.INT and ops_ast.elem_type == "neg"):
-                f = self.op_to_lambda[op1_obj.type()][ops_ast.elem_type]
-                # print("negative got here")
-                return f(op1_obj)
-            elif(op1_obj.type() == Type.BOOL and ops_ast.elem_type == "!"):
-                f = self.op_to_lambda[op1_obj.type()][ops_ast.elem_type]
-                return f(op1_obj)
-            else:
-                super().error(ErrorType.TYPE_ERROR, f"Wrong type for operation {ops_ast.elem_type}")
-            
+            super().error(ErrorType.TYPE_ERROR, f"Wrong type for operation {ops_ast.elem_type}")
+
+    # Tables mapping the elem_type of a node to the method that runs it. Node types
+    # of later versions of the language (struct, new, try, raise, ...) have no entry:
+    # statements of those types are skipped and expressions evaluate to None.
+    def __setup_dispatch(self):
+        self.statement_runners = {
+            InterpreterBase.FCALL_NODE: self.__call_statement,
+            "=": self.__assign,
+            InterpreterBase.VAR_DEF_NODE: self.__var_def,
+            InterpreterBase.IF_NODE: self.__if,
+            InterpreterBase.FOR_NODE: self.__for,
+            InterpreterBase.RETURN_NODE: self.__return,
+        }
+        self.expr_evaluators = {
+            InterpreterBase.INT_NODE: self.__eval_int,
+            InterpreterBase.STRING_NODE: self.__eval_string,
+            InterpreterBase.BOOL_NODE: self.__eval_bool,
+            InterpreterBase.NIL_NODE: self.__eval_nil,
+            InterpreterBase.VAR_NODE: self.__eval_var,
+            # the returned value from the function will be used in the expression
+            # print() returns nil
+            InterpreterBase.FCALL_NODE: self.__call_func,
+        }
+        for op in self.UNARY_OPS:
+            self.expr_evaluators[op] = self.__eval_unary_op
+        for op in self.BINARY_OPS:
+            self.expr_evaluators[op] = self.__eval_binary_op
+        # operator node -> (operand type, fused handler), see __eval_binary_op
+        self.op_caches = {}
+
 
 
     def __setup_ops(self):
@@ -351,41 +580,72 @@ class Interpreter(InterpreterBase):
         # # Parser already takes care of it, no special handling nedded.
         # Illegal to use arithmetic operation on non-integer types
         int_operation = {
-            "+": lambda x, y: Value(x.type(), x.value() + y.value( )),
-            "-": lambda x, y: Value(x.type(), x.value() - y.value()),
-            "*": lambda x, y: Value(x.type(), x.value() * y.value()),
-            "/": lambda x, y: Value(x.type(), x.value() // y.value()),
-            "neg": lambda x : Value(x.type(), -x.value()),
-            "==": lambda x, y: Value(Type.BOOL, x.value() == y.value()),
-            "!=": lambda x, y: Value(Type.BOOL, x.value() != y.value()),
-            "<": lambda x, y: Value(Type.BOOL, x.value() < y.value()),
-            "<=": lambda x, y: Value(Type.BOOL, x.value() <= y.value()),
-            ">": lambda x, y: Value(Type.BOOL, x.value() > y.value()),
-            ">=": lambda x, y: Value(Type.BOOL, x.value() >= y.value())
+            "+": lambda x, y: int_value(x.value() + y.value( )),
+            "-": lambda x, y: int_value(x.value() - y.value()),
+            "*": lambda x, y: int_value(x.value() * y.value()),
+            "/": lambda x, y: int_value(x.value() // y.value()),
+            "neg": lambda x : int_value(-x.value()),
+            "==": lambda x, y: bool_value(x.value() == y.value()),
+            "!=": lambda x, y: bool_value(x.value() != y.value()),
+            "<": lambda x, y: bool_value(x.value() < y.value()),
+            "<=": lambda x, y: bool_value(x.value() <= y.value()),
+            ">": lambda x, y: bool_value(x.value() > y.value()),
+            ">=": lambda x, y: bool_value(x.value() >= y.value())
         }
         # LOG_OPS = {"||", "&&", "!", "==", "!="}
         bool_operation = {
-            "||": lambda x, y: Value(x.type(), x.value() or y.value()),
-            "&&": lambda x, y: Value(x.type(), x.value() and y.value()),
-            "!": lambda x : Value(x.type(), not x.value()),
-            "==": lambda x, y: Value(x.type(), x.value() == y.value()),
-            "!=": lambda x, y: Value(x.type(), x.value() != y.value())
+            "||": lambda x, y: bool_value(x.value() or y.value()),
+            "&&": lambda x, y: bool_value(x.value() and y.value()),
+            "!": lambda x : bool_value(not x.value()),
+            "==": lambda x, y: bool_value(x.value() == y.value()),
+            "!=": lambda x, y: bool_value(x.value() != y.value())
         }
         # STR_OPS = {"+"}
         str_operation = {
-            "+": lambda x, y: Value(x.type(), x.value() + y.value()),
-            "==": lambda x, y: Value(Type.BOOL, x.value() == y.value()),
-            "!=": lambda x, y: Value(Type.BOOL, x.value() != y.value())
+            "+": concat_strings,
+            "==": lambda x, y: bool_value(x.value() == y.value()),
+            "!=": lambda x, y: bool_value(x.value() != y.value())
         }
         nil_operation = {
-            "==": lambda x, y: Value(Type.BOOL, x.value() == y.value()),
-            "!=": lambda x, y: Value(Type.BOOL, x.value() != y.value())
+            "==": lambda x, y: bool_value(x.value() == y.value()),
+            "!=": lambda x, y: bool_value(x.value() != y.value())
         }
         self.op_to_lambda[Type.INT].update(int_operation)
         self.op_to_lambda[Type.BOOL].update(bool_operation)
         self.op_to_lambda[Type.STRING].update(str_operation)
         self.op_to_lambda[Type.NIL].update(nil_operation)
 
+        # Fused versions of the binary operations above for two operands of the same
+        # type: they take the operands' Python values, saving the Value accessor calls.
+        # The inline caches of the tree walker and closure backends use them once an
+        # operator node has seen that type.
+        self.fused_ops = {
+            Type.INT: {
+                "+": lambda x, y: int_value(x + y),
+                "-": lambda x, y: int_value(x - y),
+                "*": lambda x, y: int_value(x * y),
+                "/": lambda x, y: int_value(x // y),
+                "==": lambda x, y: bool_value(x == y),
+                "!=": lambda x, y: bool_value(x != y),
+                "<": lambda x, y: bool_value(x < y),
+                "<=": lambda x, y: bool_value(x <= y),
+                ">": lambda x, y: bool_value(x > y),
+                ">=": lambda x, y: bool_value(x >= y),
+            },
+            Type.BOOL: {
+                "||": lambda x, y: bool_value(x or y),
+                "&&": lambda x, y: bool_value(x and y),
+                "==": lambda x, y: bool_value(x == y),
+                "!=": lambda x, y: bool_value(x != y),
+            },
+            # no "+": reading the values of its operands would join ConcatValues
+            Type.STRING: {
+                "==": lambda x, y: bool_value(x == y),
+                "!=": lambda x, y: bool_value(x != y),
+            },
+            Type.NIL: {},
+        }
+
         # add other operators here later for int, string, bool, etc
 def main():
     program =   """
@@ -414,4 +674,7 @@ hi
 """
     test = Interpreter()
     test.run(program)
-main()
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# The MemoCache remembers the return values of pure Brewin functions (see
+# resolver_v2.find_pure) by their arguments, so repeating a call returns the
+# remembered Value without running the function again. Memoization is off unless an
+# Interpreter is given a MemoCache; one cache can be shared by several runs, since
+# entries are keyed by the function's FUNC_NODE (see ast_cache.py for reusing those).
+# A call answered from the cache doesn't run the function body, so trace hooks don't
+# see the statements, scopes and calls inside it.
+from collections import OrderedDict
+
+
+class MemoCache:
+    # max_entries: number of return values kept before the least recently used ones
+    #   are evicted
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Values don't compare by content, so the key uses the type and Python value of
+    # each argument
+    def key(self, func_node, args):
+        return (func_node, tuple((arg.t, arg.v) for arg in args))
+
+    # Returns the remembered return value, or None
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
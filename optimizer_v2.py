@@ -0,0 +1,219 @@
+# The ConstantFolder is an optimization pass over a parsed program, run before any of
+# the execution modes see it:
+# - operators whose operands are all literals are replaced by the literal result
+# - an if with a literal true/false condition is replaced by the branch that runs;
+#   the branch's statements are moved into the enclosing block when it declares no
+#   variables, since its scope is then unobservable
+# - statements after a return in the same block are dropped
+# Operations that would fail at run time (a TYPE_ERROR, or division by zero) are left
+# alone, so the program still fails at the same point. The input AST is never
+# modified: changed nodes are copied and unchanged subtrees are shared, so ASTs from an
+# ast_cache.ASTCache can be optimized.
+from element import Element
+from intbase import InterpreterBase
+from type_valuev1 import (
+    Type,
+    TRUE_VALUE,
+    FALSE_VALUE,
+    LITERAL_VALUES,
+)
+
+
+class ConstantFolder:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.op_to_lambda = interpreter.op_to_lambda
+        # nodes removed from the programs folded so far
+        self.nodes_eliminated = 0
+        # Value type -> literal node type
+        self.literal_nodes = {
+            Type.INT: InterpreterBase.INT_NODE,
+            Type.STRING: InterpreterBase.STRING_NODE,
+            Type.BOOL: InterpreterBase.BOOL_NODE,
+        }
+
+    # Returns the optimized program
+    def fold_program(self, ast):
+        folded = Element(
+            InterpreterBase.PROGRAM_NODE,
+            structs=ast.get("structs"),
+            functions=[self.__fold_function(func) for func in ast.get("functions")],
+        )
+        self.nodes_eliminated += count_nodes(ast) - count_nodes(folded)
+        return folded
+
+    def __fold_function(self, func_node):
+        statements = self.__fold_statements(func_node.get("statements"))
+        if statements == func_node.get("statements"):
+            return func_node
+        return Element(
+            InterpreterBase.FUNC_NODE,
+            name=func_node.get("name"),
+            args=func_node.get("args"),
+            return_type=func_node.get("return_type"),
+            statements=statements,
+        )
+
+    # Statements
+
+    def __fold_statements(self, statements):
+        folded = []
+        for statement in statements:
+            for folded_statement in self.__fold_statement(statement):
+                folded.append(folded_statement)
+                # the rest of the block is unreachable
+                if folded_statement.elem_type == InterpreterBase.RETURN_NODE:
+                    return folded
+        return folded
+
+    # Returns the statements replacing a statement
+    def __fold_statement(self, statement):
+        elem_type = statement.elem_type
+        if elem_type == "=":
+            return [self.__fold_assign(statement)]
+        if elem_type == InterpreterBase.FCALL_NODE:
+            return [self.__fold_expr(statement)]
+        if elem_type == InterpreterBase.IF_NODE:
+            return self.__fold_if(statement)
+        if elem_type == InterpreterBase.FOR_NODE:
+            return [self.__fold_for(statement)]
+        if elem_type == InterpreterBase.RETURN_NODE:
+            expression = statement.get("expression")
+            if expression is None:
+                return [statement]
+            folded = self.__fold_expr(expression)
+            if folded is expression:
+                return [statement]
+            return [Element(InterpreterBase.RETURN_NODE, expression=folded)]
+        return [statement]
+
+    def __fold_assign(self, assign_node):
+        expression = assign_node.get("expression")
+        folded = self.__fold_expr(expression)
+        if folded is expression:
+            return assign_node
+        return Element("=", name=assign_node.get("name"), expression=folded)
+
+    def __fold_if(self, if_node):
+        condition = self.__fold_expr(if_node.get("condition"))
+        statements = self.__fold_statements(if_node.get("statements"))
+        else_statements = if_node.get("else_statements")
+        if else_statements is not None:
+            else_statements = self.__fold_statements(else_statements)
+        # a condition that isn't a bool literal is checked when the if runs
+        if condition.elem_type != InterpreterBase.BOOL_NODE:
+            return [
+                Element(
+                    InterpreterBase.IF_NODE,
+                    condition=condition,
+                    statements=statements,
+                    else_statements=else_statements,
+                )
+            ]
+        branch = statements if condition.get("val") else else_statements
+        if branch is None:
+            return []
+        if not any(s.elem_type == InterpreterBase.VAR_DEF_NODE for s in branch):
+            return branch
+        # keep the branch's scope for the variables it declares
+        return [
+            Element(
+                InterpreterBase.IF_NODE,
+                condition=Element(InterpreterBase.BOOL_NODE, val=True),
+                statements=branch,
+                else_statements=None,
+            )
+        ]
+
+    def __fold_for(self, for_node):
+        return Element(
+            InterpreterBase.FOR_NODE,
+            init=self.__fold_assign(for_node.get("init")),
+            condition=self.__fold_expr(for_node.get("condition")),
+            update=self.__fold_assign(for_node.get("update")),
+            statements=self.__fold_statements(for_node.get("statements")),
+        )
+
+    # Expressions
+
+    # Returns the folded expression, or expr_node itself if nothing changed
+    def __fold_expr(self, expr_node):
+        elem_type = expr_node.elem_type
+        if elem_type in self.interpreter.BINARY_OPS:
+            op1 = self.__fold_expr(expr_node.get("op1"))
+            op2 = self.__fold_expr(expr_node.get("op2"))
+            result = self.__eval_binary_op(elem_type, op1, op2)
+            if result is not None:
+                return self.__literal_node(result)
+            if op1 is expr_node.get("op1") and op2 is expr_node.get("op2"):
+                return expr_node
+            return Element(elem_type, op1=op1, op2=op2)
+        if elem_type in self.interpreter.UNARY_OPS:
+            op1 = self.__fold_expr(expr_node.get("op1"))
+            result = self.__eval_unary_op(elem_type, op1)
+            if result is not None:
+                return self.__literal_node(result)
+            if op1 is expr_node.get("op1"):
+                return expr_node
+            return Element(elem_type, op1=op1)
+        if elem_type == InterpreterBase.FCALL_NODE:
+            args = expr_node.get("args")
+            folded_args = [self.__fold_expr(arg) for arg in args]
+            if all(folded is arg for folded, arg in zip(folded_args, args)):
+                return expr_node
+            return Element(InterpreterBase.FCALL_NODE, name=expr_node.get("name"), args=folded_args)
+        return expr_node
+
+    # Returns the Value of an operation on two literals, or None if an operand isn't a
+    # literal or the operation fails at run time
+    def __eval_binary_op(self, op, op1, op2):
+        left_value_obj = self.__literal_value(op1)
+        right_value_obj = self.__literal_value(op2)
+        if left_value_obj is None or right_value_obj is None:
+            return None
+        if left_value_obj.type() != right_value_obj.type():
+            if op == "==":
+                return FALSE_VALUE
+            if op == "!=":
+                return TRUE_VALUE
+            return None
+        f = self.op_to_lambda[left_value_obj.type()].get(op)
+        if f is None:
+            return None
+        if op == "/" and right_value_obj.value() == 0:
+            return None
+        return f(left_value_obj, right_value_obj)
+
+    def __eval_unary_op(self, op, op1):
+        op1_obj = self.__literal_value(op1)
+        if op1_obj is None:
+            return None
+        operand_type = Type.INT if op == InterpreterBase.NEG_NODE else Type.BOOL
+        if op1_obj.type() != operand_type:
+            return None
+        return self.op_to_lambda[operand_type][op](op1_obj)
+
+    def __literal_value(self, node):
+        make_value = LITERAL_VALUES.get(node.elem_type)
+        if make_value is None:
+            return None
+        return make_value(node.get("val"))
+
+    def __literal_node(self, value):
+        if value.type() == Type.NIL:
+            return Element(InterpreterBase.NIL_NODE)
+        return Element(self.literal_nodes[value.type()], val=value.value())
+
+
+# Number of Elements in a tree
+def count_nodes(node):
+    count = 0
+    pending = [node]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, Element):
+            count += 1
+            pending.extend(value.dict.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+    return count
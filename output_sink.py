@@ -0,0 +1,47 @@
+# An OutputSink collects the lines a Brewin program prints and writes them to a file
+# in large blocks, instead of one print() call per line. Pass one to an Interpreter
+# as output_sink; it is flushed when run() returns or raises, so everything printed
+# before an error is written out.
+# The sink also decides what the interpreter keeps in its output_log (see
+# InterpreterBase.get_output): every line, only the last max_log_lines, or nothing.
+import sys
+from collections import deque
+
+
+class OutputSink:
+    # file: a text file-like object to write to, or None for the current sys.stdout
+    # buffer_size: number of characters collected before they are written
+    # max_log_lines: lines kept in output_log, None to keep them all, 0 for none
+    def __init__(self, file=None, buffer_size=64 * 1024, max_log_lines=None):
+        self.file = file
+        self.buffer_size = buffer_size
+        self.max_log_lines = max_log_lines
+        self.pending = []
+        self.pending_size = 0
+
+    # Returns a new, empty output log for an interpreter using this sink
+    def new_log(self):
+        if self.max_log_lines is None:
+            return []
+        return deque(maxlen=self.max_log_lines)
+
+    def write(self, line):
+        self.pending.append(line)
+        self.pending_size += len(line) + 1
+        if self.pending_size >= self.buffer_size:
+            self.__write_pending()
+
+    def flush(self):
+        self.__write_pending()
+        self.__file().flush()
+
+    def __write_pending(self):
+        if self.pending:
+            # the trailing "" puts a newline after the last line too
+            self.pending.append("")
+            self.__file().write("\n".join(self.pending))
+            self.pending = []
+            self.pending_size = 0
+
+    def __file(self):
+        return self.file if self.file is not None else sys.stdout
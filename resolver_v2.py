@@ -0,0 +1,188 @@
+# The FunctionResolver does lexical addressing for one Brewin function: as a compiler
+# walks the function's statements in order, it maps every declared variable and
+# parameter to a fixed slot in the function's frame (a flat list, see
+# env_v1.FrameManager), so reads and writes become list indexing at run time no
+# matter how deeply the blocks are nested.
+# Each `var` gets its own slot, so shadowed variables never share one. A name that is
+# used before any enclosing block of the function declares it resolves to None; like
+# in the tree walker, those names are looked up in the callers' frames at run time.
+from intbase import InterpreterBase
+
+
+class FunctionResolver:
+    def __init__(self, func_node):
+        # slot -> variable name
+        self.slot_names = []
+        # names referenced without a visible declaration in this function
+        self.free_names = set()
+        # one name -> slot dict for each block being compiled, innermost last
+        self.blocks = [{}]
+        # a repeated parameter name keeps the first argument, as EnvironmentManager.create
+        # refuses the second definition
+        self.param_slots = tuple(self.declare(arg.get("name")) for arg in func_node.get("args"))
+
+    def enter_block(self):
+        self.blocks.append({})
+
+    # Returns the slots declared in the block, which go out of scope with it
+    def exit_block(self):
+        return tuple(self.blocks.pop().values())
+
+    # Returns the slot of a new variable, or None if the current block already has one
+    # with that name
+    def declare(self, name):
+        if name in self.blocks[-1]:
+            return None
+        slot = len(self.slot_names)
+        self.slot_names.append(name)
+        self.blocks[-1][name] = slot
+        return slot
+
+    # Returns the slot of the innermost visible declaration of a name, or None if the
+    # name is free in this function
+    def resolve(self, name):
+        for block in reversed(self.blocks):
+            if name in block:
+                return block[name]
+        self.free_names.add(name)
+        return None
+
+    def num_slots(self):
+        return len(self.slot_names)
+
+    # name -> slots with that name, innermost declaration first. Declarations that are
+    # in scope at the same time always have increasing slots from outer to inner
+    # blocks, so the highest live slot is the one a caller-frame lookup should find.
+    def slots_by_name(self):
+        slots = {}
+        for slot, name in enumerate(self.slot_names):
+            slots.setdefault(name, []).insert(0, slot)
+        return {name: tuple(name_slots) for name, name_slots in slots.items()}
+
+
+# Walks a function with a FunctionResolver, declaring and resolving names in the same
+# order and blocks as the compilers, to find the names the function uses without
+# declaring them and the (name, number of args) of every function it calls.
+# It also finds the blocks that need a scope of their own in the tree walker's
+# EnvironmentManager: the statement lists (by id()) that declare variables directly,
+# and the function body if the function has parameters. Nothing is ever created in
+# the scope of any other block, so it can share its enclosing scope.
+class FunctionScanner:
+    def __init__(self, func_node):
+        self.resolver = FunctionResolver(func_node)
+        self.calls = set()
+        self.scoped_blocks = set()
+        statements = func_node.get("statements")
+        if func_node.get("args"):
+            self.scoped_blocks.add(id(statements))
+        self.__scan_statements(statements)
+        self.free_names = self.resolver.free_names
+
+    def __scan_statements(self, statements):
+        for statement in statements:
+            elem_type = statement.elem_type
+            if elem_type == InterpreterBase.VAR_DEF_NODE:
+                self.resolver.declare(statement.get("name"))
+                self.scoped_blocks.add(id(statements))
+            elif elem_type == "=":
+                self.__scan_assign(statement)
+            elif elem_type == InterpreterBase.IF_NODE:
+                self.__scan_expr(statement.get("condition"))
+                self.__scan_block(statement.get("statements"))
+                if statement.get("else_statements") is not None:
+                    self.__scan_block(statement.get("else_statements"))
+            elif elem_type == InterpreterBase.FOR_NODE:
+                self.__scan_assign(statement.get("init"))
+                self.__scan_expr(statement.get("condition"))
+                self.__scan_assign(statement.get("update"))
+                self.__scan_block(statement.get("statements"))
+            elif elem_type == InterpreterBase.RETURN_NODE:
+                self.__scan_expr(statement.get("expression"))
+            elif elem_type == InterpreterBase.FCALL_NODE:
+                self.__scan_expr(statement)
+
+    def __scan_block(self, statements):
+        self.resolver.enter_block()
+        self.__scan_statements(statements)
+        self.resolver.exit_block()
+
+    def __scan_assign(self, assign_node):
+        self.__scan_expr(assign_node.get("expression"))
+        self.resolver.resolve(assign_node.get("name"))
+
+    def __scan_expr(self, expr_node):
+        if expr_node is None:
+            return
+        if expr_node.elem_type == InterpreterBase.VAR_NODE:
+            self.resolver.resolve(expr_node.get("name"))
+        elif expr_node.elem_type == InterpreterBase.FCALL_NODE:
+            args = expr_node.get("args")
+            self.calls.add((expr_node.get("name"), len(args)))
+            for arg in args:
+                self.__scan_expr(arg)
+        else:
+            # operators; literals have neither operand
+            self.__scan_expr(expr_node.get("op1"))
+            self.__scan_expr(expr_node.get("op2"))
+
+
+# (name, number of args) -> FunctionScanner for every function in a function table
+# (function name -> {number of args: FUNC_NODE})
+def scan_functions(func_table):
+    scanners = {}
+    for func_name, overloads in func_table.items():
+        for num_args, func_node in overloads.items():
+            scanners[(func_name, num_args)] = FunctionScanner(func_node)
+    return scanners
+
+
+# Returns the functions of keys that only call functions of keys, directly or through
+# other functions. Calls to names that aren't in the function table don't count.
+def restrict_to_callers_of(scanners, keys):
+    keys = set(keys)
+    changed = True
+    while changed:
+        changed = False
+        for key in list(keys):
+            calls = scanners[key].calls
+            if any(callee in scanners and callee not in keys for callee in calls):
+                keys.remove(key)
+                changed = True
+    return keys
+
+
+# Returns the functions that calling key can lead to, directly or through other
+# functions. Calls to names that aren't in the function table don't count.
+def find_reachable(scanners, key):
+    reachable = set()
+    pending = [key]
+    while pending:
+        for callee in scanners[pending.pop()].calls:
+            if callee in scanners and callee not in reachable:
+                reachable.add(callee)
+                pending.append(callee)
+    return reachable
+
+
+# Returns the (name, number of args) of the functions that can be called with a
+# tail call, which drops the frame of the function making the call before the callee
+# runs. Names a function doesn't declare are looked up in its callers' frames, so
+# that is only safe if neither the callee nor anything it calls uses such names.
+def find_tail_callable(scanners):
+    return restrict_to_callers_of(
+        scanners, [key for key, scanner in scanners.items() if not scanner.free_names]
+    )
+
+
+# Returns the (name, number of args) of the pure functions: their return value only
+# depends on their arguments, and calling them has no effect besides returning it.
+# They use no names they don't declare, don't call the functions in impure_names
+# (the builtins doing I/O), and only call pure functions.
+def find_pure(scanners, impure_names):
+    candidates = [
+        key
+        for key, scanner in scanners.items()
+        if not scanner.free_names
+        and not any(func_name in impure_names for func_name, _ in scanner.calls)
+    ]
+    return restrict_to_callers_of(scanners, candidates)
@@ -0,0 +1,164 @@
+# Runs every .br golden test under the given files and directories (tests/ and
+# fails/ by default) on a BatchRunner and checks the results against the comment at
+# the end of each file:
+#   /*
+#   *IN*
+#   lines returned by inputi/inputs
+#   *IN*
+#   *OUT*
+#   expected output, one line per print
+#   ErrorType.NAME_ERROR    <- optional; the error the program must end with
+#   *OUT*
+#   */
+# A test expecting an error passes if the program ends with that error type. If the
+# block lists lines above the error, the output must match them as well. Trailing
+# whitespace is ignored when comparing lines. Files without an *OUT* block are skipped.
+# Prints one line per test with its wall time, then the slowest tests and a summary.
+# Exits with status 1 if a test failed.
+#   python run_tests.py [-j processes] [-t timeout] [-m exec_mode] [-s slowest] [path ...]
+import os
+import sys
+import time
+
+from batch_runner import ERROR, OK, BatchRunner, embedded_inputs, marked_lines
+from interpreterv2 import Interpreter
+
+DEFAULT_PATHS = ("tests", "fails")
+ERROR_PREFIX = "ErrorType."
+
+
+class GoldenTest:
+    def __init__(self, path, program, inputs, expected_output, expected_error):
+        self.path = path
+        self.program = program
+        # None when the file has no *IN* block
+        self.inputs = inputs
+        self.expected_output = expected_output
+        # name of an ErrorType, e.g. "TYPE_ERROR", or None
+        self.expected_error = expected_error
+
+
+# Returns the GoldenTest of a .br file, or None if it has no *OUT* block
+def parse_golden_test(path, source):
+    expected = marked_lines(source, "*OUT*")
+    if expected is None:
+        return None
+    expected = [line.rstrip() for line in expected]
+    while expected and not expected[-1]:
+        expected.pop()
+    expected_error = None
+    if expected and expected[-1].strip().startswith(ERROR_PREFIX):
+        expected_error = expected.pop().strip()[len(ERROR_PREFIX) :]
+    return GoldenTest(path, source, embedded_inputs(source), expected, expected_error)
+
+
+def discover(paths):
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+            continue
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+            files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith(".br"))
+    return files
+
+
+# The GoldenTests of the .br files under paths that have an *OUT* block
+def load_golden_tests(paths=DEFAULT_PATHS):
+    tests = []
+    for path in discover(paths):
+        with open(path) as f:
+            test = parse_golden_test(path, f.read())
+        if test is not None:
+            tests.append(test)
+    return tests
+
+
+# Runs a program in this process and returns what it printed and its
+# (error type, error line), both None if it didn't fail
+def run_program(program, inp=None, **interpreter_args):
+    interpreter = Interpreter(console_output=False, inp=inp, **interpreter_args)
+    try:
+        interpreter.run(program)
+    except Exception:
+        pass
+    return interpreter.get_output(), interpreter.get_error_type_and_line()
+
+
+# Returns None if the result matches the test, otherwise what went wrong
+def check(test, result):
+    if test.expected_error is not None:
+        if result.status != ERROR:
+            return f"expected {ERROR_PREFIX}{test.expected_error}, got {describe(result)}"
+        if result.error_type.name != test.expected_error:
+            return f"expected {ERROR_PREFIX}{test.expected_error}, got {result.error_type}"
+        if not test.expected_output:
+            return None
+    elif result.status != OK:
+        return f"expected output, got {describe(result)}"
+    output = [str(line).rstrip() for line in result.output_log]
+    if output != test.expected_output:
+        return f"expected output {test.expected_output}, got {output}"
+    return None
+
+
+def describe(result):
+    if result.status == ERROR:
+        return str(result.error_type)
+    if result.status == OK:
+        return "no error"
+    if result.message:
+        return f"{result.status} ({result.message})"
+    return result.status
+
+
+def main(argv):
+    options = {"-j": None, "-t": 10.0, "-m": "tree", "-s": 10}
+    while argv and argv[0] in options:
+        options[argv[0]] = argv[1]
+        argv = argv[2:]
+    processes = int(options["-j"]) if options["-j"] is not None else None
+    slowest = int(options["-s"])
+
+    tests = []
+    skipped = 0
+    for path in discover(argv or DEFAULT_PATHS):
+        with open(path) as f:
+            test = parse_golden_test(path, f.read())
+        if test is None:
+            skipped += 1
+        else:
+            tests.append(test)
+
+    start = time.perf_counter()
+    failed = []
+    times = []
+    tasks = ((test.program, test.inputs) for test in tests)
+    with BatchRunner(processes, float(options["-t"]), exec_mode=options["-m"]) as runner:
+        for result in runner.run(tasks):
+            test = tests[result.index]
+            problem = check(test, result)
+            times.append((result.wall_time, test.path))
+            if problem is None:
+                print(f"PASS {test.path} ({result.wall_time * 1000:.1f} ms)")
+            else:
+                failed.append(test.path)
+                print(f"FAIL {test.path} ({result.wall_time * 1000:.1f} ms): {problem}")
+    elapsed = time.perf_counter() - start
+
+    if slowest and times:
+        print(f"\nslowest {min(slowest, len(times))}:")
+        for wall_time, path in sorted(times, reverse=True)[:slowest]:
+            print(f"  {wall_time * 1000:9.1f} ms  {path}")
+    print(
+        f"\n{len(tests) - len(failed)} passed, {len(failed)} failed, {skipped} skipped "
+        f"in {elapsed:.2f} s"
+    )
+    for path in sorted(failed):
+        print(f"  failed: {path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
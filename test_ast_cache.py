@@ -0,0 +1,91 @@
+# Checks the on-disk side of ASTCache: entries are evicted least recently used first
+# once the store outgrows max_disk_bytes, entries of another parser version are
+# dropped, and an entry that vanishes while it is loaded or stored never fails a run.
+import os
+import shutil
+import tempfile
+
+import ast_cache
+from ast_cache import ASTCache
+from ast_codec import encode_ast
+from brewparse import parse_program
+from interpreterv2 import Interpreter
+
+
+def program(i):
+    return f"func main() {{ print({i}); }}"
+
+
+def entry_path(cache, i):
+    return os.path.join(cache.directory, cache.key(program(i)) + ".ast")
+
+
+def run(cache, i):
+    interpreter = Interpreter(console_output=False, ast_cache=cache)
+    interpreter.run(program(i))
+    return interpreter.get_output()
+
+
+def test_eviction():
+    entry_size = len(encode_ast(parse_program(program(0))))
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ASTCache(directory=directory, max_disk_bytes=2 * entry_size)
+        cache.parse(program(0))
+        cache.parse(program(1))
+        # program 0 was used last, so program 1 goes first
+        os.utime(entry_path(cache, 1), (1000, 1000))
+        os.utime(entry_path(cache, 0), (2000, 2000))
+        cache.parse(program(2))
+        assert os.path.exists(entry_path(cache, 0))
+        assert not os.path.exists(entry_path(cache, 1))
+        assert os.path.exists(entry_path(cache, 2))
+        sizes = [entry.stat().st_size for entry in os.scandir(cache.directory)]
+        assert sum(sizes) <= 2 * entry_size
+
+
+def test_parser_change():
+    with tempfile.TemporaryDirectory() as directory:
+        old_cache = ASTCache(directory=directory)
+        old_cache.parse(program(0))
+        real_fingerprint = ast_cache.parser_fingerprint
+        ast_cache.parser_fingerprint = lambda: "f" * 64
+        try:
+            cache = ASTCache(directory=directory)
+        finally:
+            ast_cache.parser_fingerprint = real_fingerprint
+        assert not os.path.exists(old_cache.directory)
+        assert run(cache, 0) == ["0"]
+        assert cache.misses == 1 and cache.disk_hits == 0
+
+
+def test_entry_vanishes():
+    with tempfile.TemporaryDirectory() as directory:
+        ASTCache(directory=directory).parse(program(0))
+        cache = ASTCache(directory=directory)
+        path = entry_path(cache, 0)
+        real_decode_ast = ast_cache.decode_ast
+
+        # another process evicts the entry right after it was read
+        def decode_and_evict(data):
+            os.remove(path)
+            return real_decode_ast(data)
+
+        ast_cache.decode_ast = decode_and_evict
+        try:
+            assert run(cache, 0) == ["0"]
+        finally:
+            ast_cache.decode_ast = real_decode_ast
+        assert cache.disk_hits == 1
+
+        # the whole store disappears: runs still work from memory
+        shutil.rmtree(cache.directory)
+        assert run(cache, 1) == ["1"]
+        assert run(cache, 1) == ["1"]
+        assert cache.misses == 1 and cache.hits == 1
+
+
+if __name__ == "__main__":
+    test_eviction()
+    test_parser_change()
+    test_entry_vanishes()
+    print("ASTCache eviction, invalidation and vanishing entries: PASS")
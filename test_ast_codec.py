@@ -0,0 +1,51 @@
+# Checks that every program in tests/ and fails/ survives an encode/decode round trip
+# through ast_codec and runs exactly as before, and that ASTs nested far deeper than
+# Python's recursion limit can be encoded, decoded and cached on disk.
+import tempfile
+
+from ast_cache import ASTCache
+from ast_codec import decode_ast, encode_ast
+from brewparse import parse_program
+from interpreterv2 import Interpreter
+from run_tests import load_golden_tests, run_program
+
+# the python mode caches generated code by program text, so it would reuse the code
+# built from the original AST
+EXEC_MODES = sorted(Interpreter.EXEC_MODES - {"python"})
+DEEP = 5000
+
+
+# stands in for an ASTCache, handing the interpreter round-tripped ASTs
+class RoundTrip:
+    def parse(self, program):
+        return decode_ast(encode_ast(parse_program(program)))
+
+
+def test():
+    tests = load_golden_tests()
+    for golden in tests:
+        ast = parse_program(golden.program)
+        assert str(decode_ast(encode_ast(ast))) == str(ast), golden.path
+        for exec_mode in EXEC_MODES:
+            expected = run_program(golden.program, golden.inputs, exec_mode=exec_mode)
+            round_trip = run_program(
+                golden.program, golden.inputs, exec_mode=exec_mode, ast_cache=RoundTrip()
+            )
+            assert round_trip == expected, (golden.path, exec_mode)
+
+    program = "func main() { print(" + "-(" * DEEP + "1" + ")" * DEEP + "); }"
+    ast = parse_program(program)
+    data = encode_ast(ast)
+    assert encode_ast(decode_ast(data)) == data
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ASTCache(directory=directory)
+        cache.parse(program)
+        assert cache.misses == 1
+        cache = ASTCache(directory=directory)
+        cache.parse(program)
+        assert cache.disk_hits == 1
+    print(f"round-tripped {len(tests)} programs and a depth {DEEP} AST: PASS")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,84 @@
+# Checks BatchRunner: programs that loop forever time out without holding up the
+# others, a worker killed mid-program is reported as crashed and replaced, Brewin
+# errors (including a FAULT_ERROR from runaway recursion) come back as errors, workers
+# are recycled after max_tasks_per_worker programs, and a run the caller abandons
+# leaves no stale results for the next one.
+import os
+import signal
+import threading
+
+from batch_runner import CRASHED, ERROR, OK, TIMEOUT, BatchRunner
+from intbase import ErrorType
+
+TIMEOUT_SECONDS = 0.5
+LOOP = "func main() { var i; for (i = 0; true; i = i) { i = 0; } }"
+RECURSE = "func f(n) { return f(n + 1) + 1; } func main() { print(f(0)); }"
+TYPE_ERROR = 'func main() {\n print(1);\n print(1 + "x");\n}'
+
+
+def echo(i):
+    return f"func main() {{ print({i}); }}"
+
+
+def results_by_index(runner, tasks):
+    return {result.index: result for result in runner.run(tasks)}
+
+
+def test_timeout_and_errors():
+    read_input = ("func main() { print(inputi()); }", ["5"])
+    tasks = [LOOP, echo(1), (RECURSE, None), TYPE_ERROR, read_input]
+    with BatchRunner(2, TIMEOUT_SECONDS) as runner:
+        results = results_by_index(runner, tasks)
+        assert results[0].status == TIMEOUT
+        assert results[0].wall_time >= TIMEOUT_SECONDS
+        assert (results[1].status, results[1].output_log) == (OK, ["1"])
+        assert results[2].status == ERROR
+        assert results[2].error_type == ErrorType.FAULT_ERROR
+        assert results[3].status == ERROR
+        assert results[3].error_type == ErrorType.TYPE_ERROR
+        assert results[3].output_log == ["1"]
+        assert (results[4].status, results[4].output_log) == (OK, ["5"])
+        # the worker killed for the timeout was replaced
+        assert results_by_index(runner, [echo(2), echo(3)])[1].output_log == ["3"]
+
+
+def test_crash():
+    with BatchRunner(1, None) as runner:
+        pid = runner.workers[0].process.pid
+        # the worker dies while it runs the loop
+        threading.Timer(TIMEOUT_SECONDS, os.kill, (pid, signal.SIGKILL)).start()
+        results = results_by_index(runner, [LOOP, echo(1)])
+        assert results[0].status == CRASHED
+        assert (results[1].status, results[1].output_log) == (OK, ["1"])
+        assert runner.workers[0].process.pid != pid
+
+
+def test_recycling():
+    with BatchRunner(1, None, max_tasks_per_worker=2) as runner:
+        # process id of the worker that ran each program
+        pids = []
+        pid = runner.workers[0].process.pid
+        for result in runner.run(echo(i) for i in range(5)):
+            assert result.output_log == [str(result.index)]
+            pids.append(pid)
+            pid = runner.workers[0].process.pid
+        assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4]
+
+
+def test_abandoned_run():
+    with BatchRunner(2, None) as runner:
+        for result in runner.run([echo(1), LOOP, echo(3)]):
+            assert result.output_log == ["1"]
+            break
+        # nothing left over from the loop or the program queued behind it
+        assert all(worker.index is None for worker in runner.workers)
+        results = results_by_index(runner, [echo(10), echo(11)])
+        assert [results[i].output_log for i in range(2)] == [["10"], ["11"]]
+
+
+if __name__ == "__main__":
+    test_timeout_and_errors()
+    test_crash()
+    test_recycling()
+    test_abandoned_run()
+    print("BatchRunner timeouts, crashes, recycling and abandoned runs: PASS")
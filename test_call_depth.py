@@ -0,0 +1,53 @@
+# Checks max_call_depth: the bytecode VM raises a FAULT_ERROR once calls nest deeper
+# inside main than the limit, its default allows recursion a million calls deep, and
+# the other modes, which can't enforce a limit, reject the argument.
+from intbase import ErrorType
+from interpreterv2 import Interpreter
+
+# f(n) nests n + 1 calls of f inside main
+PROGRAM = """
+func f(n) {
+  if (n == 0) {
+    return 0;
+  }
+  return 1 + f(n - 1);
+}
+
+func main() {
+  print(f(%d));
+}
+"""
+
+
+def run(n, **interpreter_args):
+    interpreter = Interpreter(console_output=False, exec_mode="bytecode", **interpreter_args)
+    try:
+        interpreter.run(PROGRAM % n)
+    except Exception:
+        return interpreter.error_type
+    return interpreter.get_output()
+
+
+def test_limit():
+    assert run(9, max_call_depth=10) == ["9"]
+    assert run(10, max_call_depth=10) == ErrorType.FAULT_ERROR
+
+
+def test_default_limit():
+    assert run(1_000_000) == ["1000000"]
+
+
+def test_other_modes_reject_limit():
+    for exec_mode in sorted(Interpreter.EXEC_MODES - {"bytecode"}):
+        try:
+            Interpreter(exec_mode=exec_mode, max_call_depth=10)
+        except ValueError:
+            continue
+        raise AssertionError(f"{exec_mode} accepted max_call_depth")
+
+
+if __name__ == "__main__":
+    test_limit()
+    test_default_limit()
+    test_other_modes_reject_limit()
+    print("max_call_depth: PASS")
@@ -0,0 +1,88 @@
+# Checks ConcatValue: values built on a shared prefix keep their own contents, reading
+# a value in the middle of a chain doesn't change the values built on it, and long
+# concatenated strings compare and print like any other string in every execution mode.
+from interpreterv2 import Interpreter
+from run_tests import run_program
+from type_valuev1 import CONCAT_MIN_LENGTH, ConcatValue, Type, Value, concat_strings
+
+
+def string(s):
+    return Value(Type.STRING, s)
+
+
+def test_branching():
+    s = concat_strings(string("p" * CONCAT_MIN_LENGTH), string("q"))
+    assert type(s) is ConcatValue
+    a = concat_strings(s, string("x"))
+    b = concat_strings(s, string("y"))
+    aa = concat_strings(a, string("1"))
+    bb = concat_strings(b, string("2"))
+    prefix = "p" * CONCAT_MIN_LENGTH + "q"
+    assert aa.v == prefix + "x1"
+    assert bb.v == prefix + "y2"
+    assert a.v == prefix + "x"
+    assert b.v == prefix + "y"
+    assert s.v == prefix
+
+
+def test_read_middle():
+    first = concat_strings(string("a" * CONCAT_MIN_LENGTH), string("b"))
+    middle = concat_strings(first, string("c"))
+    last = concat_strings(middle, string("d"))
+    prefix = "a" * CONCAT_MIN_LENGTH
+    assert middle.v == prefix + "bc"
+    # appending to the middle value again, after it was joined
+    other = concat_strings(middle, string("e"))
+    assert last.v == prefix + "bcd"
+    assert other.v == prefix + "bce"
+    assert first.v == prefix + "b"
+    assert middle.v == prefix + "bc"
+
+
+def test_short_strings_stay_plain():
+    s = concat_strings(string("a"), string("b"))
+    assert type(s) is Value and s.v == "ab"
+
+
+PROGRAM = """
+func main() {
+  var s;
+  var a;
+  var b;
+  var i;
+  s = "";
+  for (i = 0; i < 300; i = i + 1) {
+    s = s + "x";
+  }
+  a = s + "x";
+  b = s + "y";
+  print(a == b, " ", a != b, " ", a == s + "x", " ", b == s + "y");
+  print(s == s, " ", s == "x", " ", s == nil, " ", s != 1);
+  a = a + "!";
+  print(b);
+  print(a);
+  print(s);
+}
+"""
+
+
+def test_program():
+    s = "x" * 300
+    expected = [
+        "false true true true",
+        "true false false true",
+        s + "y",
+        s + "x!",
+        s,
+    ]
+    for exec_mode in sorted(Interpreter.EXEC_MODES):
+        output, error = run_program(PROGRAM, exec_mode=exec_mode)
+        assert (output, error) == (expected, (None, None)), (exec_mode, output, error)
+
+
+if __name__ == "__main__":
+    test_branching()
+    test_read_middle()
+    test_short_strings_stay_plain()
+    test_program()
+    print("ConcatValue branching, joining and comparisons: PASS")
@@ -0,0 +1,48 @@
+# Runs deeply nested expressions in every execution mode, including the python mode's
+# fallback to closures when CPython can't compile the generated code. Each run must
+# print the right result or, where nesting overflows the Python stack, end with a
+# FAULT_ERROR; a raw RecursionError must never escape Interpreter.run.
+from intbase import ErrorType
+from interpreterv2 import Interpreter
+
+DEPTHS = (10, 100, 200, 400, 800, 3000)
+
+
+def sum_program(depth):
+    return "func main() { print(" + " + ".join(["1"] * depth) + "); }", [str(depth)]
+
+
+def negation_program(depth):
+    program = "func main() { print(" + "-(" * depth + "1" + ")" * depth + "); }"
+    return program, ["-1" if depth % 2 else "1"]
+
+
+def run(program, exec_mode):
+    interpreter = Interpreter(console_output=False, exec_mode=exec_mode)
+    try:
+        interpreter.run(program)
+    except RecursionError:
+        raise AssertionError(f"RecursionError escaped in {exec_mode} mode")
+    except Exception:
+        assert interpreter.error_type == ErrorType.FAULT_ERROR, interpreter.error_type
+        return ErrorType.FAULT_ERROR
+    return interpreter.get_output()
+
+
+def test():
+    for make_program in (sum_program, negation_program):
+        for depth in DEPTHS:
+            program, expected = make_program(depth)
+            for exec_mode in sorted(Interpreter.EXEC_MODES):
+                result = run(program, exec_mode)
+                assert result in (expected, ErrorType.FAULT_ERROR), (
+                    make_program.__name__,
+                    depth,
+                    exec_mode,
+                    result,
+                )
+    print(f"nested expressions up to depth {DEPTHS[-1]}: PASS")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,27 @@
+# Checks that every execution mode fails a non-bool if or for condition with the same
+# message as the tree walker.
+from interpreterv2 import Interpreter
+
+PROGRAMS = {
+    "func main() { if (1) { print(1); } }": "If condition does not return bool value",
+    "func main() { var i; for (i = 0; i; i = i + 1) { print(1); } }": (
+        "Loop condition must evaluate to bool values"
+    ),
+}
+
+
+def test_condition_messages():
+    for program, message in PROGRAMS.items():
+        for exec_mode in sorted(Interpreter.EXEC_MODES):
+            interpreter = Interpreter(console_output=False, exec_mode=exec_mode)
+            try:
+                interpreter.run(program)
+            except Exception as e:
+                assert str(e) == f"ErrorType.TYPE_ERROR: {message}", (exec_mode, str(e))
+            else:
+                raise AssertionError(f"no error in {exec_mode} mode")
+
+
+if __name__ == "__main__":
+    test_condition_messages()
+    print("if and for condition error messages: PASS")
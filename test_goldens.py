@@ -0,0 +1,29 @@
+# Runs every golden test in tests/ and fails/ (see run_tests.py) in each execution
+# mode, so a behavior that only one backend gets wrong shows up as a failure.
+from batch_runner import BatchRunner
+from interpreterv2 import Interpreter
+from run_tests import check, load_golden_tests
+
+
+# Returns (path, problem) for every test that fails with these Interpreter arguments
+def run_goldens(tests, **interpreter_args):
+    failures = []
+    with BatchRunner(timeout=60, **interpreter_args) as runner:
+        for result in runner.run((test.program, test.inputs) for test in tests):
+            test = tests[result.index]
+            problem = check(test, result)
+            if problem is not None:
+                failures.append((test.path, problem))
+    return failures
+
+
+def test():
+    tests = load_golden_tests()
+    for exec_mode in sorted(Interpreter.EXEC_MODES):
+        failures = run_goldens(tests, exec_mode=exec_mode)
+        assert not failures, (exec_mode, failures)
+    print(f"{len(tests)} golden tests in {len(Interpreter.EXEC_MODES)} modes: PASS")
+
+
+if __name__ == "__main__":
+    test()
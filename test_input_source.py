@@ -0,0 +1,57 @@
+# Checks InputSource: lines come out the same whatever the chunk size, with \n, \r\n
+# and \r endings split across chunk boundaries and UTF-8 characters cut in half, and
+# iterables of str or bytes lines lose their \n or \r\n like file input does.
+import io
+
+from input_source import InputSource
+from interpreterv2 import Interpreter
+
+TEXT = "first\r\nsecond\n\r\nthird\rcafé über\r\n\nlast"
+LINES = ["first", "second", "", "third", "café über", "", "last"]
+
+
+def read_all(source):
+    lines = []
+    while (line := source.next_line()) is not None:
+        lines.append(line)
+    return lines
+
+
+def test_chunk_boundaries():
+    data = TEXT.encode()
+    for chunk_size in range(1, len(data) + 2):
+        assert read_all(InputSource(io.BytesIO(data), chunk_size)) == LINES, chunk_size
+        text = io.StringIO(TEXT, newline="")
+        assert read_all(InputSource(text, chunk_size)) == LINES, chunk_size
+    # a trailing newline doesn't add an empty last line
+    assert read_all(InputSource(io.BytesIO(b"a\r\nb\r\n"), 3)) == ["a", "b"]
+    assert read_all(InputSource(io.BytesIO(b""), 3)) == []
+
+
+def test_iterable_line_endings():
+    items = ["a\r\n", "b\n", "c", "\r\n", "d\r\n"]
+    assert read_all(InputSource(iter(items))) == ["a", "b", "c", "", "d"]
+    assert read_all(InputSource(item.encode() for item in items)) == ["a", "b", "c", "", "d"]
+
+
+def test_program_input():
+    program = """
+func main() {
+  print(inputi() + inputi());
+  print(inputs(), "!");
+}
+"""
+    for inp in (io.BytesIO(b"1\r\n2\r\nend\r\n"), io.StringIO("1\r\n2\r\nend\r\n", newline="")):
+        interpreter = Interpreter(console_output=False, inp=inp)
+        interpreter.run(program)
+        assert interpreter.get_output() == ["3", "end!"]
+    interpreter = Interpreter(console_output=False, inp=iter(["1\r\n", "2\r\n", "end\r\n"]))
+    interpreter.run(program)
+    assert interpreter.get_output() == ["3", "end!"]
+
+
+if __name__ == "__main__":
+    test_chunk_boundaries()
+    test_iterable_line_endings()
+    test_program_input()
+    print("InputSource chunk boundaries and line endings: PASS")
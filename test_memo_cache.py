@@ -0,0 +1,67 @@
+# Checks memoization: only pure functions go through the MemoCache, so functions that
+# print, read input, read a name they don't define (dynamic scoping) or call such a
+# function run on every call in every execution mode, and the cache itself counts
+# hits, misses and least-recently-used evictions.
+from interpreterv2 import Interpreter
+from memo_cache import MemoCache
+from run_tests import run_program
+
+PROGRAM = """
+func square(n) { return n * n; }
+func shout(n) { print(n); return n; }
+func ask(n) { return inputi() + n; }
+func read_x(n) { return x + n; }
+func via_shout(n) { return shout(n) + 1; }
+
+func main() {
+  var x;
+  x = 10;
+  print(square(3), " ", square(3));
+  print(shout(1), " ", shout(1));
+  print(ask(1), " ", ask(1));
+  print(read_x(1));
+  x = 20;
+  print(read_x(1));
+  print(via_shout(2), " ", via_shout(2));
+}
+"""
+EXPECTED_OUTPUT = ["9 9", "1", "1", "1 1", "6 8", "11", "21", "2", "2", "3 3"]
+
+
+def test_impure_functions():
+    for exec_mode in sorted(Interpreter.EXEC_MODES):
+        cache = MemoCache()
+        output, error = run_program(PROGRAM, ["5", "7"], exec_mode=exec_mode, memo_cache=cache)
+        assert (output, error) == (EXPECTED_OUTPUT, (None, None)), (exec_mode, output, error)
+        # only square(3) is remembered: one miss, then one hit
+        assert len(cache.entries) == 1, exec_mode
+        assert (cache.hits, cache.misses) == (1, 1), (exec_mode, cache.hits, cache.misses)
+
+        interpreter = Interpreter(
+            console_output=False, inp=["5", "7"], exec_mode=exec_mode, memo_cache=MemoCache()
+        )
+        interpreter.run(PROGRAM)
+        memoized = {func_node.get("name") for func_node in interpreter.memoized_funcs}
+        assert memoized == {"square"}, (exec_mode, memoized)
+
+
+def test_lru_counts():
+    cache = MemoCache(max_entries=2)
+    assert cache.get("a") is None
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    # "b" is now the least recently used entry
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert (cache.hits, cache.misses, cache.evictions) == (3, 2, 1)
+    assert list(cache.entries) == ["a", "c"]
+    cache.clear()
+    assert cache.get("a") is None and not cache.entries
+
+
+if __name__ == "__main__":
+    test_impure_functions()
+    test_lru_counts()
+    print("memoization of pure functions only, MemoCache LRU counts: PASS")
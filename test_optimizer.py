@@ -0,0 +1,42 @@
+# Checks that optimize=True changes nothing a program can observe: every program in
+# tests/ and fails/ prints the same lines and ends with the same error, at the same
+# point, in every execution mode. Also checks how many nodes the ConstantFolder
+# removes from small programs.
+from interpreterv2 import Interpreter
+from run_tests import load_golden_tests, run_program
+
+# program -> nodes_eliminated
+FOLDED = {
+    # 1 + 2 * 3 becomes 7: two operators and three literals become one literal
+    "func main() { print(1 + 2 * 3); }": 4,
+    "func main() { var x; x = 1; print(x + 1); }": 0,
+    # the if, its condition and the dead branch go; print(2) moves up a block
+    "func main() { if (false) { print(1); } else { print(2); } print(3); }": 4,
+    "func main() { print(1); return; print(2); }": 2,
+    # would be a TYPE_ERROR, so it is left for the program to fail on
+    'func main() { print(1 + "a"); }': 0,
+    # comparing values of different types is allowed, and false
+    'func main() { print(1 == "a"); }': 2,
+}
+
+
+def test():
+    tests = load_golden_tests()
+    for golden in tests:
+        for exec_mode in sorted(Interpreter.EXEC_MODES):
+            expected = run_program(golden.program, golden.inputs, exec_mode=exec_mode)
+            optimized = run_program(golden.program, golden.inputs, exec_mode=exec_mode, optimize=True)
+            assert optimized == expected, (golden.path, exec_mode)
+
+    for program, nodes_eliminated in FOLDED.items():
+        interpreter = Interpreter(console_output=False, optimize=True)
+        try:
+            interpreter.run(program)
+        except Exception:
+            pass
+        assert interpreter.nodes_eliminated == nodes_eliminated, (program, interpreter.nodes_eliminated)
+    print(f"{len(tests)} programs unchanged by optimize=True, {len(FOLDED)} folding counts: PASS")
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,64 @@
+# Checks OutputSink: with max_log_lines the interpreter keeps only the last lines in a
+# ring buffer while the file gets every line, get_output() still returns a list, and
+# lines buffered before a program fails are flushed when run() raises.
+import io
+
+from interpreterv2 import Interpreter
+from output_sink import OutputSink
+
+PROGRAM = """
+func main() {
+  var i;
+  for (i = 0; i < 10; i = i + 1) {
+    print(i);
+  }
+}
+"""
+FAILING_PROGRAM = """
+func main() {
+  print("before");
+  print(1 + "x");
+  print("after");
+}
+"""
+
+
+def run(program, exec_mode, **sink_args):
+    file = io.StringIO()
+    sink = OutputSink(file, **sink_args)
+    interpreter = Interpreter(output_sink=sink, exec_mode=exec_mode)
+    try:
+        interpreter.run(program)
+    except Exception:
+        pass
+    return interpreter, file.getvalue()
+
+
+def test_ring_buffer():
+    lines = [str(i) for i in range(10)]
+    for exec_mode in sorted(Interpreter.EXEC_MODES):
+        interpreter, written = run(PROGRAM, exec_mode, max_log_lines=3)
+        assert interpreter.get_output() == lines[-3:], exec_mode
+        assert written == "\n".join(lines) + "\n", exec_mode
+
+        interpreter, written = run(PROGRAM, exec_mode, max_log_lines=0)
+        assert interpreter.get_output() == [], exec_mode
+        assert written == "\n".join(lines) + "\n", exec_mode
+
+        interpreter, written = run(PROGRAM, exec_mode, buffer_size=4)
+        assert interpreter.get_output() == lines, exec_mode
+        assert written == "\n".join(lines) + "\n", exec_mode
+
+
+def test_flush_on_error():
+    for exec_mode in sorted(Interpreter.EXEC_MODES):
+        interpreter, written = run(FAILING_PROGRAM, exec_mode)
+        assert interpreter.error_type is not None, exec_mode
+        assert interpreter.get_output() == ["before"], exec_mode
+        assert written == "before\n", (exec_mode, written)
+
+
+if __name__ == "__main__":
+    test_ring_buffer()
+    test_flush_on_error()
+    print("OutputSink ring buffer and flush on error: PASS")
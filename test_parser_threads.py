@@ -0,0 +1,41 @@
+# Parses hundreds of programs concurrently from a thread pool and checks that every
+# thread gets its own AST and the right line number in its syntax errors.
+from concurrent.futures import ThreadPoolExecutor
+
+from brewparse import parse_program
+
+NUM_PROGRAMS = 400
+
+
+# program i prints i on line i + 2; odd programs have a syntax error on that line
+def make_program(i):
+    lines = ["func main() {"]
+    lines += ["  var x;"] * i
+    lines.append(f"  print({i});" if i % 2 == 0 else f"  print({i}) +;")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def parse(i):
+    try:
+        return i, parse_program(make_program(i)), None
+    except SyntaxError as e:
+        return i, None, str(e)
+
+
+def test():
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(parse, range(NUM_PROGRAMS)))
+    for i, ast, error in results:
+        if i % 2 == 0:
+            assert error is None, error
+            statements = ast.get("functions")[0].get("statements")
+            assert len(statements) == i + 1
+            assert statements[-1].get("args")[0].get("val") == i
+        else:
+            assert error == f"Syntax error at ';' on line {i + 2}", error
+    print(f"parsed {NUM_PROGRAMS} programs concurrently: PASS")
+
+
+if __name__ == "__main__":
+    test()
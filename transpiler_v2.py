@@ -0,0 +1,428 @@
+# The PythonTranspiler turns every function of a program into the source of a Python
+# function and compiles the whole program with compile(), so the program runs as
+# CPython bytecode with no per-node dispatch at all.
+# In generated code, Brewin values are plain Python values: int, bool, str, and None
+# for nil. Types are always tested with `type(x) is`, since a Python bool is also an
+# int. Variables are Python locals, one per declaration as numbered by
+# resolver_v2.FunctionResolver, and `for` loops become while loops. Operators are
+# inlined behind a type guard for their common operand types; other operands go
+# through binary_op(), which computes the result or raises the same TYPE_ERROR as the
+# other backends. A `return f(...)` of the function itself becomes a jump back to
+# its start, unless it is inside a for loop.
+# A function can't see the Python locals of its callers, so programs where some
+# function uses a variable it doesn't declare (dynamic scoping) aren't transpiled.
+# Neither are programs with other tail calls that can recur, such as mutually
+# recursive functions or a `return f(...)` in a for loop of f, since nesting
+# Python calls would overflow where the other backends run in constant stack; nor
+# are runs with trace hooks. Interpreter.run uses the ClosureCompiler for those
+# instead.
+# Compiled programs are cached by a hash of the program text, so running a program
+# again skips transpiling and compiling it.
+import hashlib
+import operator
+import threading
+from collections import OrderedDict
+
+from resolver_v2 import FunctionResolver
+from type_valuev1 import Type, Value
+from intbase import InterpreterBase, ErrorType
+
+MAX_COMPILED_PROGRAMS = 256
+# program key -> (code object, {(name, num_args): name of its Python function}), or
+# None for programs that can't be transpiled
+compiled_programs = OrderedDict()
+compiled_programs_lock = threading.Lock()
+
+# Python type of a value in generated code -> its Brewin type
+VALUE_TYPES = {int: Type.INT, bool: Type.BOOL, str: Type.STRING, type(None): Type.NIL}
+
+# The binary operators of each type, on Python values
+RAW_OPS = {
+    int: {
+        "+": operator.add,
+        "-": operator.sub,
+        "*": operator.mul,
+        "/": operator.floordiv,
+        "==": operator.eq,
+        "!=": operator.ne,
+        "<": operator.lt,
+        "<=": operator.le,
+        ">": operator.gt,
+        ">=": operator.ge,
+    },
+    bool: {
+        "||": lambda x, y: x or y,
+        "&&": lambda x, y: x and y,
+        "==": operator.eq,
+        "!=": operator.ne,
+    },
+    str: {"+": operator.add, "==": operator.eq, "!=": operator.ne},
+    type(None): {"==": operator.eq, "!=": operator.ne},
+}
+
+# Generated code of each operator. {a} and {b} are the temporaries holding the
+# operands, {left} and {right} the operand expressions. Every template evaluates both
+# operands, left first, before it looks at their types.
+INT_OP = "({a} %s {b} if type({a} := {left}) is type({b} := {right}) is int else binary_op(%r, {a}, {b}))"
+BOOL_OP = "({a} %s {b} if type({a} := {left}) is type({b} := {right}) is bool else binary_op(%r, {a}, {b}))"
+BINARY_OP_TEMPLATES = {
+    "+": "({a} + {b} if type({a} := {left}) is type({b} := {right}) in ADD_TYPES else binary_op('+', {a}, {b}))",
+    "-": INT_OP % ("-", "-"),
+    "*": INT_OP % ("*", "*"),
+    "/": INT_OP % ("//", "/"),
+    "<": INT_OP % ("<", "<"),
+    "<=": INT_OP % ("<=", "<="),
+    ">": INT_OP % (">", ">"),
+    ">=": INT_OP % (">=", ">="),
+    "&&": BOOL_OP % ("and", "&&"),
+    "||": BOOL_OP % ("or", "||"),
+    # values of different types are never equal
+    "==": "(type({a} := {left}) is type({b} := {right}) and {a} == {b})",
+    "!=": "(type({a} := {left}) is not type({b} := {right}) or {a} != {b})",
+}
+UNARY_OP_TEMPLATES = {
+    InterpreterBase.NEG_NODE: "(-{a} if type({a} := {operand}) is int else unary_op_error('neg'))",
+    InterpreterBase.NOT_NODE: "(not {a} if type({a} := {operand}) is bool else unary_op_error('!'))",
+}
+
+
+def printable(val):
+    if val is True:
+        return "true"
+    if val is False:
+        return "false"
+    if val is None:
+        return "nil"
+    return str(val)
+
+
+# The globals of a transpiled program: the functions and constants generated code
+# uses, bound to the interpreter running it
+def runtime_namespace(interpreter):
+    error = interpreter.error
+    output = interpreter.output
+
+    def binary_op(op, left, right):
+        left_type = type(left)
+        if left_type is not type(right):
+            if op == "==":
+                return False
+            if op == "!=":
+                return True
+            error(ErrorType.TYPE_ERROR, f"Incompatible types for {op} operation")
+        f = RAW_OPS[left_type].get(op)
+        if f is None:
+            error(
+                ErrorType.TYPE_ERROR,
+                f"Incompatible operator {op} for type {VALUE_TYPES[left_type]}",
+            )
+        return f(left, right)
+
+    def unary_op_error(op):
+        error(ErrorType.TYPE_ERROR, f"Wrong type for operation {op}")
+
+    def input_value(func_name, prompt):
+        if prompt:
+            output(printable(prompt[0]))
+        inp = interpreter.get_input()
+        if func_name == "inputi":
+            return int(inp)
+        return inp
+
+    return {
+        "ADD_TYPES": (int, str),
+        "TYPE_ERROR": ErrorType.TYPE_ERROR,
+        "NAME_ERROR": ErrorType.NAME_ERROR,
+        "binary_op": binary_op,
+        "unary_op_error": unary_op_error,
+        "input_value": input_value,
+        "printable": printable,
+        "output": output,
+        "error": error,
+    }
+
+
+# Wraps the Python function of a pure Brewin function so its calls go through a
+# memo_cache.MemoCache. Keys and remembered values are the same as the other
+# backends', so the cache can be shared with them.
+def memoized(func, func_node, memo_cache):
+    def call_memoized(*args):
+        key = (func_node, tuple([(VALUE_TYPES[type(arg)], arg) for arg in args]))
+        return_value = memo_cache.get(key)
+        if return_value is None:
+            result = func(*args)
+            memo_cache.put(key, Value(VALUE_TYPES[type(result)], result))
+            return result
+        return return_value.v
+
+    return call_memoized
+
+
+class PythonTranspiler:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.func_table = interpreter.func_name_to_ast
+        # (function name, num_args) -> name of its Python function
+        self.func_names = {}
+        self.__setup_emitters()
+
+    # Returns the Python function running the requested Brewin function, or None if
+    # the program can't be transpiled
+    def compile_program(self, program, main_name="main", main_num_args=0):
+        if any(self.interpreter.hooks.values()):
+            return None
+        key = self.__program_key(program)
+        with compiled_programs_lock:
+            compiled = compiled_programs.get(key, False)
+            if compiled is not False:
+                compiled_programs.move_to_end(key)
+        if compiled is False:
+            compiled = self.__compile()
+            with compiled_programs_lock:
+                compiled_programs[key] = compiled
+                if len(compiled_programs) > MAX_COMPILED_PROGRAMS:
+                    compiled_programs.popitem(last=False)
+        if compiled is None:
+            return None
+        code, func_names = compiled
+        namespace = runtime_namespace(self.interpreter)
+        exec(code, namespace)
+        for (func_name, num_args), py_name in func_names.items():
+            func_node = self.func_table[func_name][num_args]
+            if func_node in self.interpreter.memoized_funcs:
+                namespace[py_name] = memoized(
+                    namespace[py_name], func_node, self.interpreter.memo_cache
+                )
+        return namespace[func_names[(main_name, main_num_args)]]
+
+    # Returns the Python source of the program, or None if it can't be transpiled
+    def transpile_program(self):
+        for func_name, overloads in self.func_table.items():
+            for num_args in overloads:
+                self.func_names[(func_name, num_args)] = f"f_{func_name}_{num_args}"
+        functions = []
+        for key, py_name in self.func_names.items():
+            source = self.__transpile_function(key, py_name)
+            if source is None:
+                return None
+            functions.append(source)
+        return "\n\n".join(functions)
+
+    def __program_key(self, program):
+        # the optimizer changes the AST, and so the generated code
+        digest = hashlib.sha256(b"O" if self.interpreter.optimize else b"-")
+        digest.update(program.encode())
+        return digest.hexdigest()
+
+    def __compile(self):
+        source = self.transpile_program()
+        if source is None:
+            return None
+        try:
+            code = compile(source, "<brewin>", "exec")
+        except (SyntaxError, RecursionError, MemoryError):
+            # nesting deeper than CPython's parser allows. The closure compiler runs
+            # such programs instead; if they overflow it too, Interpreter.run reports
+            # a FAULT_ERROR like the tree walker does.
+            return None
+        return code, self.func_names
+
+    def __setup_emitters(self):
+        self.statement_emitters = {
+            InterpreterBase.FCALL_NODE: self.__emit_call_statement,
+            "=": self.__emit_assign,
+            InterpreterBase.VAR_DEF_NODE: self.__emit_var_def,
+            InterpreterBase.IF_NODE: self.__emit_if,
+            InterpreterBase.FOR_NODE: self.__emit_for,
+            InterpreterBase.RETURN_NODE: self.__emit_return,
+        }
+        self.expr_generators = {
+            InterpreterBase.INT_NODE: self.__gen_const,
+            InterpreterBase.STRING_NODE: self.__gen_const,
+            InterpreterBase.BOOL_NODE: self.__gen_const,
+            InterpreterBase.NIL_NODE: self.__gen_const,
+            InterpreterBase.VAR_NODE: self.__gen_var,
+            InterpreterBase.FCALL_NODE: self.__gen_call,
+            InterpreterBase.NEG_NODE: self.__gen_unary_op,
+            InterpreterBase.NOT_NODE: self.__gen_unary_op,
+        }
+        for op in self.interpreter.BINARY_OPS:
+            self.expr_generators[op] = self.__gen_binary_op
+
+    # Returns the source of a Python function, or None if the Brewin function uses
+    # variables it doesn't declare or makes tail calls a Python call can't replace
+    def __transpile_function(self, key, py_name):
+        func_node = self.func_table[key[0]][key[1]]
+        self.resolver = FunctionResolver(func_node)
+        self.key = key
+        self.lines = []
+        self.indent = 1
+        # number of for loops around the statement being emitted
+        self.loop_depth = 0
+        # set once a tail call jumps back to the start of the function
+        self.restarts = False
+        # operator nesting depth of the expression being generated, which numbers
+        # the temporaries of its operands
+        self.expr_depth = 0
+        self.param_names = [
+            self.__var_name(slot) if slot is not None else f"_{i}"
+            for i, slot in enumerate(self.resolver.param_slots)
+        ]
+        # set by a `return f(...)` that can recur back to this function and that
+        # can't jump back to its start
+        self.unbounded_tail_calls = False
+        self.__emit_statements(func_node.get("statements"))
+        if self.resolver.free_names or self.unbounded_tail_calls:
+            return None
+        body = self.lines
+        if self.restarts:
+            body = ["    while True:"] + ["    " + line for line in body]
+            body.append("        return None")
+        return "\n".join([f"def {py_name}({', '.join(self.param_names)}):"] + body)
+
+    def __emit(self, line):
+        self.lines.append("    " * self.indent + line)
+
+    def __var_name(self, slot):
+        return f"v_{self.resolver.slot_names[slot]}_{slot}"
+
+    # Statements
+
+    def __emit_statements(self, statements):
+        num_lines = len(self.lines)
+        for statement in statements:
+            emitter = self.statement_emitters.get(statement.elem_type)
+            # the tree walker silently skips any other kind of statement
+            if emitter is not None:
+                emitter(statement)
+        if len(self.lines) == num_lines:
+            self.__emit("pass")
+
+    def __emit_block(self, statements):
+        self.resolver.enter_block()
+        self.indent += 1
+        self.__emit_statements(statements)
+        self.indent -= 1
+        self.resolver.exit_block()
+
+    def __emit_call_statement(self, call_node):
+        self.__emit(self.__gen_call(call_node))
+
+    def __emit_assign(self, assign_node):
+        expr = self.__gen_expr(assign_node.get("expression"))
+        slot = self.resolver.resolve(assign_node.get("name"))
+        if slot is not None:
+            self.__emit(f"{self.__var_name(slot)} = {expr}")
+
+    def __emit_var_def(self, var_node):
+        var_name = var_node.get("name")
+        slot = self.resolver.declare(var_name)
+        if slot is None:
+            message = f"Duplicate definition for variable {var_name}"
+            self.__emit(f"error(NAME_ERROR, {message!r})")
+        else:
+            self.__emit(f"{self.__var_name(slot)} = 0")
+
+    def __emit_if(self, if_node):
+        condition = self.__gen_expr(if_node.get("condition"))
+        self.__emit(f"if (_c := {condition}) is True:")
+        self.__emit_block(if_node.get("statements"))
+        self.__emit("elif _c is not False:")
+        self.__emit("    error(TYPE_ERROR, 'If condition does not return bool value')")
+        else_statements = if_node.get("else_statements")
+        if else_statements is not None:
+            self.__emit("else:")
+            self.__emit_block(else_statements)
+
+    def __emit_for(self, for_node):
+        self.__emit_assign(for_node.get("init"))
+        condition = self.__gen_expr(for_node.get("condition"))
+        self.__emit(f"while (_c := {condition}) is True:")
+        self.loop_depth += 1
+        self.__emit_block(for_node.get("statements"))
+        self.loop_depth -= 1
+        self.indent += 1
+        self.__emit_assign(for_node.get("update"))
+        self.indent -= 1
+        self.__emit("if _c is not False:")
+        self.__emit("    error(TYPE_ERROR, 'Loop condition must evaluate to bool values')")
+
+    def __emit_return(self, return_node):
+        expression = return_node.get("expression")
+        if expression is None:
+            self.__emit("return None")
+            return
+        if expression.elem_type == InterpreterBase.FCALL_NODE:
+            callee = (expression.get("name"), len(expression.get("args")))
+            if callee == self.key and self.loop_depth == 0:
+                self.__emit_restart(expression.get("args"))
+                return
+            # the other backends run this as a tail call, so recursion through it
+            # takes no stack there; a nested Python call would overflow
+            if self.key in self.interpreter.tail_call_reach.get(callee, ()):
+                self.unbounded_tail_calls = True
+        self.__emit(f"return {self.__gen_expr(expression)}")
+
+    # `return f(...)` in f: bind the arguments to the parameters and start over
+    def __emit_restart(self, args):
+        args = [self.__gen_expr(arg) for arg in args]
+        if args:
+            self.__emit(f"{', '.join(self.param_names)}, = {', '.join(args)},")
+        self.__emit("continue")
+        self.restarts = True
+
+    # Expressions
+
+    def __gen_expr(self, expr_node):
+        generator = self.expr_generators.get(expr_node.elem_type)
+        if generator is None:
+            return "None"
+        return generator(expr_node)
+
+    def __gen_const(self, const_node):
+        # repr() of a bool, int or str is a Python literal of it
+        return f"({const_node.get('val')!r})"
+
+    def __gen_var(self, var_node):
+        slot = self.resolver.resolve(var_node.get("name"))
+        if slot is None:
+            # the function isn't transpiled
+            return "None"
+        return self.__var_name(slot)
+
+    def __gen_call(self, call_node):
+        func_name = call_node.get("name")
+        args = call_node.get("args")
+        if func_name == "print":
+            printables = [f"printable({self.__gen_expr(arg)})" for arg in args]
+            if len(printables) == 1:
+                return f"output({printables[0]})"
+            return f"output(''.join(({''.join(p + ', ' for p in printables)})))"
+        if func_name in ["inputi", "inputs"]:
+            if len(args) > 1:
+                message = "No inputi() function that takes > 1 parameter"
+                return f"error(NAME_ERROR, {message!r})"
+            prompt = "".join(self.__gen_expr(arg) + ", " for arg in args)
+            return f"input_value({func_name!r}, ({prompt}))"
+        py_name = self.func_names.get((func_name, len(args)))
+        if py_name is None:
+            # calls to unknown functions are only an error if they are executed
+            return f"error(NAME_ERROR, {f'Function {func_name} not found'!r})"
+        return f"{py_name}({', '.join(self.__gen_expr(arg) for arg in args)})"
+
+    def __gen_binary_op(self, op_node):
+        depth = self.expr_depth
+        self.expr_depth += 1
+        left = self.__gen_expr(op_node.get("op1"))
+        right = self.__gen_expr(op_node.get("op2"))
+        self.expr_depth -= 1
+        return BINARY_OP_TEMPLATES[op_node.elem_type].format(
+            a=f"_a{depth}", b=f"_b{depth}", left=left, right=right
+        )
+
+    def __gen_unary_op(self, op_node):
+        depth = self.expr_depth
+        self.expr_depth += 1
+        operand = self.__gen_expr(op_node.get("op1"))
+        self.expr_depth -= 1
+        return UNARY_OP_TEMPLATES[op_node.elem_type].format(a=f"_a{depth}", operand=operand)
@@ -8,8 +8,12 @@ class Type:
     STRING = "string"
     NIL = "nil"
 
-# Represents a value, which has a type and its value
+# Represents a value, which has a type and its value.
+# Values are immutable once created, so the same Value object can be shared by any
+# number of variables and expressions (see the shared values below).
 class Value:
+    __slots__ = ("t", "v")
+
     def __init__(self, type, value=None):
         self.t = type
         self.v = value
@@ -21,18 +25,95 @@ class Value:
         return self.t
 
 
+# Shared values, so nil, booleans and common integers don't allocate a new Value
+# every time an expression produces one
+NIL_VALUE = Value(Type.NIL, None)
+TRUE_VALUE = Value(Type.BOOL, True)
+FALSE_VALUE = Value(Type.BOOL, False)
+SMALL_INT_MIN = -128
+SMALL_INT_MAX = 1024
+SMALL_INTS = [Value(Type.INT, i) for i in range(SMALL_INT_MIN, SMALL_INT_MAX + 1)]
+
+
+# Strings made by + that are at least this long are built as a ConcatValue
+CONCAT_MIN_LENGTH = 256
+
+
+# A string Value made by +. Its parts are only joined into one str when its value is
+# read (printed, compared, ...), so building a long string with repeated
+# s = s + "..." takes linear instead of quadratic time. Values built on one another
+# share their parts list: a ConcatValue is the first count parts of the list, and
+# appending to the value the list ends with just extends the list.
+class ConcatValue(Value):
+    __slots__ = ("parts", "count", "flat")
+
+    def __init__(self, parts):
+        self.t = Type.STRING
+        self.parts = parts
+        self.count = len(parts)
+        self.flat = None
+
+    @property
+    def v(self):
+        if self.flat is None:
+            parts = self.parts
+            if len(parts) != self.count:
+                parts = parts[: self.count]
+            self.flat = "".join(parts)
+            # later appends start from the joined string instead of every part
+            self.parts = [self.flat]
+            self.count = 1
+        return self.flat
+
+
+# The + of two string Values
+def concat_strings(x, y):
+    right = y.v
+    if type(x) is ConcatValue:
+        parts = x.parts
+        if len(parts) != x.count:
+            # another value was built on x already
+            parts = parts[: x.count]
+        parts.append(right)
+        return ConcatValue(parts)
+    left = x.v
+    if len(left) + len(right) < CONCAT_MIN_LENGTH:
+        return Value(Type.STRING, left + right)
+    return ConcatValue([left, right])
+
+
+def int_value(i):
+    if SMALL_INT_MIN <= i <= SMALL_INT_MAX:
+        return SMALL_INTS[i - SMALL_INT_MIN]
+    return Value(Type.INT, i)
+
+
+def bool_value(b):
+    return TRUE_VALUE if b else FALSE_VALUE
+
+
+# literal node type -> function making the Value of the node's val; shared by every
+# backend and the optimizer so literals evaluate the same everywhere
+LITERAL_VALUES = {
+    InterpreterBase.INT_NODE: int_value,
+    InterpreterBase.STRING_NODE: lambda val: Value(Type.STRING, val),
+    InterpreterBase.BOOL_NODE: bool_value,
+    InterpreterBase.NIL_NODE: lambda val: NIL_VALUE,
+}
+
+
 def create_value(val):
     if val == InterpreterBase.TRUE_DEF:
-        return Value(Type.BOOL, True)
+        return TRUE_VALUE
     elif val == InterpreterBase.FALSE_DEF:
-        return Value(Type.BOOL, False)
+        return FALSE_VALUE
     elif val == InterpreterBase.NIL_DEF:
-        return Value(Type.NIL, None)
+        return NIL_VALUE
     elif isinstance(val, str):
         return Value(Type.STRING, val)
     elif isinstance(val, int):
         # print("create an int here")
-        return Value(Type.INT, val)
+        return int_value(val)
     else:
         raise ValueError("Unknown value type")
 